@@ -1,10 +1,15 @@
 import os
 import subprocess
 import threading
+import batchExtraction
+import datasetCatalog
 import extractNormalPSD
 import extractStrokePSD
+import rawCache
+import strokeReader
+import uiChannel
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext, ttk
+from tkinter import filedialog, messagebox, ttk
 
 class EEGDataFeatureExtractionInterface:
     def __init__(self, root):
@@ -17,7 +22,10 @@ class EEGDataFeatureExtractionInterface:
 
         # Instance Variables
         self.file_list = []
+        self.file_metadata = {}  # Catalogued subject/severity/eye of the listed files
         self.output_dir = tk.StringVar()
+        self.cache_dir = tk.StringVar(value=rawCache.DEFAULT_CACHE_DIR)
+        self.montage_file = tk.StringVar()
         self.progress_bar = None
 
         # GUI Setup
@@ -82,12 +90,114 @@ class EEGDataFeatureExtractionInterface:
         create_button(button_frame, "Reset", self.reset)
         create_button(button_frame, "Start", self.start_feature_extraction, side=tk.RIGHT)
 
+        # Dropdown (PSD engine used for Normal datasets)
+        self.engine_var = tk.StringVar(value="Vectorized")
+        engine_dropdown = tk.OptionMenu(button_frame, self.engine_var, *extractNormalPSD.ENGINES)
+        engine_dropdown.config(width=button_width, bg=button_bg)
+        engine_dropdown.pack(side=tk.RIGHT, padx=default_pad, pady=default_pad)
+
         # Dropdown (Normal/Stroke)
         self.selection_var = tk.StringVar(value="Normal")
         selection_dropdown = tk.OptionMenu(button_frame, self.selection_var, "Normal", "Stroke")
         selection_dropdown.config(width=button_width, bg=button_bg)
         selection_dropdown.pack(side=tk.RIGHT, padx=default_pad, pady=default_pad)
 
+        # Options Frame
+        options_frame = tk.Frame(self.root, bg=frame_bg)
+        options_frame.pack(pady=default_pad, fill=tk.X)
+
+        # Worker Processes Spinbox (1 processes the files one at a time)
+        self.workers_var = tk.StringVar(value="1")
+        workers_label = tk.Label(options_frame, text="Workers:", bg=frame_bg, font=default_font)
+        workers_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+        workers_spinbox = tk.Spinbox(options_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.workers_var,
+                                     width=5, font=default_font)
+        workers_spinbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Shards Spinbox (splits each recording across worker threads)
+        self.shards_var = tk.StringVar(value="1")
+        shards_label = tk.Label(options_frame, text="Shards per file:", bg=frame_bg, font=default_font)
+        shards_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+        shards_spinbox = tk.Spinbox(options_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.shards_var,
+                                    width=5, font=default_font)
+        shards_spinbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Dropdown (Channels/Time sharding)
+        self.shard_by_var = tk.StringVar(value="Channels")
+        shard_by_dropdown = tk.OptionMenu(options_frame, self.shard_by_var, "Channels", "Time")
+        shard_by_dropdown.config(width=button_width, bg=button_bg)
+        shard_by_dropdown.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Streaming Checkbox (reads long recordings in chunks with bounded memory)
+        self.streaming_var = tk.BooleanVar(value=False)
+        streaming_checkbox = tk.Checkbutton(options_frame, text="Streaming", variable=self.streaming_var,
+                                            bg=frame_bg, font=default_font)
+        streaming_checkbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Incremental Checkbox (skips files whose content and parameters are unchanged)
+        self.incremental_var = tk.BooleanVar(value=True)
+        incremental_checkbox = tk.Checkbutton(options_frame, text="Incremental", variable=self.incremental_var,
+                                              bg=frame_bg, font=default_font)
+        incremental_checkbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Profile Checkbox (logs a per-phase timing summary and saves a Chrome trace to the output directory)
+        self.profile_var = tk.BooleanVar(value=False)
+        profile_checkbox = tk.Checkbutton(options_frame, text="Profile", variable=self.profile_var, bg=frame_bg,
+                                          font=default_font)
+        profile_checkbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Dropdown (CSV/NPZ/CSV+NPZ output for Normal datasets)
+        self.output_format_var = tk.StringVar(value="CSV")
+        output_format_dropdown = tk.OptionMenu(options_frame, self.output_format_var, *extractNormalPSD.OUTPUT_FORMATS)
+        output_format_dropdown.config(width=button_width, bg=button_bg)
+        output_format_dropdown.pack(side=tk.RIGHT, padx=default_pad, pady=default_pad)
+
+        # Dropdown (Drop/Forward Fill/Interpolate "===" gaps in Stroke datasets)
+        self.gap_policy_var = tk.StringVar(value="Drop")
+        gap_policy_dropdown = tk.OptionMenu(options_frame, self.gap_policy_var, *strokeReader.GAP_POLICIES)
+        gap_policy_dropdown.config(width=button_width, bg=button_bg)
+        gap_policy_dropdown.pack(side=tk.RIGHT, padx=default_pad, pady=default_pad)
+
+        # Cache Frame
+        cache_frame = tk.Frame(self.root, bg=frame_bg)
+        cache_frame.pack(pady=default_pad, fill=tk.X)
+
+        # Cache Checkbox (reads raw inputs through memory-mapped binary copies)
+        self.cache_var = tk.BooleanVar(value=False)
+        cache_checkbox = tk.Checkbutton(cache_frame, text="Cache Directory:", variable=self.cache_var,
+                                        bg=frame_bg, font=default_font)
+        cache_checkbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Cache Directory Entry
+        cache_entry = tk.Entry(cache_frame, textvariable=self.cache_dir, font=default_font)
+        cache_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=default_pad, pady=default_pad)
+
+        # Cache Size Spinbox (least recently used entries are evicted beyond this size)
+        self.cache_size_var = tk.StringVar(value=str(rawCache.DEFAULT_MAX_MB))
+        cache_size_label = tk.Label(cache_frame, text="Max MB:", bg=frame_bg, font=default_font)
+        cache_size_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+        cache_size_spinbox = tk.Spinbox(cache_frame, from_=64, to=1 << 20, increment=64,
+                                        textvariable=self.cache_size_var, width=8, font=default_font)
+        cache_size_spinbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Browse Button
+        create_button(cache_frame, "Browse", self.browse_cache)
+
+        # Montage Frame
+        montage_frame = tk.Frame(self.root, bg=frame_bg)
+        montage_frame.pack(pady=default_pad, fill=tk.X)
+
+        # Montage File Label
+        montage_label = tk.Label(montage_frame, text="Montage File:", bg=frame_bg, font=default_font)
+        montage_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Montage File Entry (optional JSON of extra region layouts)
+        montage_entry = tk.Entry(montage_frame, textvariable=self.montage_file, font=default_font)
+        montage_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=default_pad, pady=default_pad)
+
+        # Browse Button
+        create_button(montage_frame, "Browse", self.browse_montage)
+
         # Progress Frame
         progress_frame = tk.Frame(self.root, bg=frame_bg)
         progress_frame.pack(pady=default_pad, fill=tk.X, anchor="w")
@@ -109,9 +219,12 @@ class EEGDataFeatureExtractionInterface:
         log_label.pack(anchor="center", padx=default_pad, pady=default_pad)
 
         # Log Box
-        self.log_box = scrolledtext.ScrolledText(log_frame, height=8, wrap=tk.WORD, bg="#F5F5F5", font=log_font)
+        self.log_box = uiChannel.LogBox(log_frame, height=8, wrap=tk.WORD, bg="#F5F5F5", font=log_font)
         self.log_box.pack(fill=tk.BOTH, expand=True)
 
+        # Channel carrying log and progress updates from the processing threads
+        self.channel = uiChannel.UiChannel(self.root, self.log_box, self.progress_bar)
+
         # Clear Button Frame
         clear_button_frame = tk.Frame(log_frame, bg=frame_bg)
         clear_button_frame.pack(fill=tk.X, pady=default_pad)
@@ -132,14 +245,34 @@ class EEGDataFeatureExtractionInterface:
             self.output_dir.set(directory)
             self.log(f"Output directory set to: {os.path.normpath(directory)}")
 
+    def browse_cache(self):
+        directory = filedialog.askdirectory()
+        if directory:
+            self.cache_dir.set(directory)
+            self.log(f"Cache directory set to: {os.path.normpath(directory)}")
+
+    def browse_montage(self):
+        file = filedialog.askopenfilename(filetypes=[("JSON Files", "*.json")])
+        if file:
+            self.montage_file.set(file)
+            self.log(f"Montage file set to: {os.path.normpath(file)}")
+
     def log(self, message):
-        self.log_box.insert(tk.END, message + "\n")
-        self.log_box.yview(tk.END)
+        self.channel.log(message)
+
+    def set_progress(self, value, maximum=None):
+        self.channel.set_progress(value, maximum)
+
+    def show_info(self, title, message):
+        self.channel.call(messagebox.showinfo, title, message)
+
+    def show_warning(self, title, message):
+        self.channel.call(messagebox.showwarning, title, message)
 
     # Helper method to add csv to file list and file table, and log the number of files added
-    def add_csv(self, files):
+    def add_csv(self, files, extensions=('.csv',)):
         for file in files:
-            if file.endswith('.csv'):
+            if file.lower().endswith(extensions):
                 self.file_list.append(os.path.normpath(file))
                 self.file_table.insert("", tk.END, values=(os.path.normpath(file),))
             self.log(f"Added file: {os.path.normpath(file)}")
@@ -147,13 +280,13 @@ class EEGDataFeatureExtractionInterface:
     def add_directory(self):
         directory = filedialog.askdirectory()
         if directory:
-            files = [os.path.join(root, file) for root, _, file_list in os.walk(directory) for file in file_list]
-            self.add_csv(files)
+            kind = 'stroke_export' if "Stroke" in self.selection_var.get() else 'normal_raw'
+            self.add_csv(datasetCatalog.select_files(self, directory, kind), ('.csv', '.txt'))
 
     def add_file(self):
-        file = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
+        file = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv"), ("TXT Files", "*.TXT")])
         if file:
-            self.add_csv([file])
+            self.add_csv([file], ('.csv', '.txt'))
 
     def remove_file(self):
         selected_items = self.file_table.selection()
@@ -166,6 +299,7 @@ class EEGDataFeatureExtractionInterface:
 
     def reset(self):
         self.file_list = []
+        self.file_metadata = {}
         for item in self.file_table.get_children():
             self.file_table.delete(item)
         self.progress_bar['value'] = 0
@@ -181,7 +315,10 @@ class EEGDataFeatureExtractionInterface:
 
         target_process = None
         selected_value = self.selection_var.get()
-        if "Normal" in selected_value:
+        if int(self.workers_var.get()) > 1:
+            target_process = batchExtraction.process
+
+        elif "Normal" in selected_value:
             target_process = extractNormalPSD.process
 
         elif "Stroke" in selected_value:
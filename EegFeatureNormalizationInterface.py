@@ -1,11 +1,16 @@
-import re
 import os
 import subprocess
 import threading
+import datasetCatalog
+import featureLoader
+import featureStore
 import normalizeNormal
 import normalizeStroke
+import scalerRegistry
+import streamingScalers
+import uiChannel
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext, ttk
+from tkinter import filedialog, messagebox, ttk
 
 class EEGFeatureNormalizationInterface:
     def __init__(self, root):
@@ -18,7 +23,10 @@ class EEGFeatureNormalizationInterface:
 
         # Instance Variables
         self.file_list = []
+        self.file_metadata = {}  # Catalogued subject/severity/eye of the listed files
         self.output_dir = tk.StringVar()
+        self.registry_dir = tk.StringVar(value=scalerRegistry.DEFAULT_REGISTRY_DIR)
+        self.scaler_file = tk.StringVar()
         self.progress_bar = None
 
         # GUI Setup
@@ -83,9 +91,9 @@ class EEGFeatureNormalizationInterface:
         create_button(button_frame, "Reset", self.reset)
         create_button(button_frame, "Start", self.start_normalization, side=tk.RIGHT)
 
-        # Dropdown (Standard/MinMax)
+        # Dropdown (Standard/MinMax/Robust/Quantile)
         self.scaler_var = tk.StringVar(value="Standard")
-        scaler_dropdown = tk.OptionMenu(button_frame, self.scaler_var, "Standard", "MinMax")
+        scaler_dropdown = tk.OptionMenu(button_frame, self.scaler_var, *streamingScalers.SCALERS)
         scaler_dropdown.config(width=button_width, bg=button_bg)
         scaler_dropdown.pack(side=tk.RIGHT, padx=default_pad, pady=default_pad)
 
@@ -95,6 +103,95 @@ class EEGFeatureNormalizationInterface:
         selection_dropdown.config(width=button_width, bg=button_bg)
         selection_dropdown.pack(side=tk.RIGHT, padx=default_pad, pady=default_pad)
 
+        # Options Frame
+        options_frame = tk.Frame(self.root, bg=frame_bg)
+        options_frame.pack(pady=default_pad, fill=tk.X)
+
+        # Worker Processes Spinbox (streaming Robust/Quantile fits are split across processes and merged)
+        self.workers_var = tk.StringVar(value="1")
+        workers_label = tk.Label(options_frame, text="Workers:", bg=frame_bg, font=default_font)
+        workers_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+        workers_spinbox = tk.Spinbox(options_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.workers_var,
+                                     width=5, font=default_font)
+        workers_spinbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Threads Spinbox (files read concurrently)
+        self.threads_var = tk.StringVar(value=str(featureLoader.DEFAULT_THREADS))
+        threads_label = tk.Label(options_frame, text="Threads:", bg=frame_bg, font=default_font)
+        threads_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+        threads_spinbox = tk.Spinbox(options_frame, from_=1, to=32, textvariable=self.threads_var, width=5,
+                                     font=default_font)
+        threads_spinbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Sketch Error Entry (rank error bound of the Robust/Quantile quantile sketches)
+        self.sketch_error_var = tk.StringVar(value=str(streamingScalers.DEFAULT_ERROR))
+        sketch_error_label = tk.Label(options_frame, text="Sketch Error:", bg=frame_bg, font=default_font)
+        sketch_error_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+        sketch_error_entry = tk.Entry(options_frame, textvariable=self.sketch_error_var, width=8, font=default_font)
+        sketch_error_entry.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Dropdown (CSV/Columnar/CSV+Columnar normalized tables; Columnar is memory-mapped by the SVM stage)
+        self.output_format_var = tk.StringVar(value="CSV")
+        output_format_dropdown = tk.OptionMenu(options_frame, self.output_format_var, *featureStore.TABLE_FORMATS)
+        output_format_dropdown.config(width=button_width, bg=button_bg)
+        output_format_dropdown.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Dropdown (CSV parser; Arrow is listed when pyarrow is installed)
+        self.parser_var = tk.StringVar(value="C")
+        parser_dropdown = tk.OptionMenu(options_frame, self.parser_var, *featureLoader.PARSERS)
+        parser_dropdown.config(width=button_width, bg=button_bg)
+        parser_dropdown.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Grouped Checkbox (Stroke: one scaler and test set per severity and eye state instead of one overall)
+        self.grouped_var = tk.BooleanVar(value=False)
+        grouped_checkbox = tk.Checkbutton(options_frame, text="Grouped", variable=self.grouped_var, bg=frame_bg,
+                                          font=default_font)
+        grouped_checkbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Streaming Checkbox (fits the scaler file by file and normalizes in a second pass, bounding memory)
+        self.streaming_var = tk.BooleanVar(value=False)
+        streaming_checkbox = tk.Checkbutton(options_frame, text="Streaming", variable=self.streaming_var,
+                                            bg=frame_bg, font=default_font)
+        streaming_checkbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Profile Checkbox (logs a per-phase timing summary and saves a Chrome trace to the output directory)
+        self.profile_var = tk.BooleanVar(value=False)
+        profile_checkbox = tk.Checkbutton(button_frame, text="Profile", variable=self.profile_var, bg=frame_bg,
+                                          font=default_font)
+        profile_checkbox.pack(side=tk.RIGHT, padx=default_pad, pady=default_pad)
+
+        # Registry Frame
+        registry_frame = tk.Frame(self.root, bg=frame_bg)
+        registry_frame.pack(pady=default_pad, fill=tk.X)
+
+        # Registry Checkbox (reuses scalers already fitted on the same cohort, scaler and input files)
+        self.registry_var = tk.BooleanVar(value=False)
+        registry_checkbox = tk.Checkbutton(registry_frame, text="Scaler Registry:", variable=self.registry_var,
+                                           bg=frame_bg, font=default_font)
+        registry_checkbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Registry Directory Entry
+        registry_entry = tk.Entry(registry_frame, textvariable=self.registry_dir, font=default_font)
+        registry_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=default_pad, pady=default_pad)
+
+        # Browse Button
+        create_button(registry_frame, "Browse", self.browse_registry)
+
+        # Scaler File Frame
+        scaler_file_frame = tk.Frame(self.root, bg=frame_bg)
+        scaler_file_frame.pack(pady=default_pad, fill=tk.X)
+
+        # Scaler File Label
+        scaler_file_label = tk.Label(scaler_file_frame, text="Scaler File:", bg=frame_bg, font=default_font)
+        scaler_file_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Scaler File Entry (optional fitted scaler, e.g. train_scaler.pkl, applied instead of fitting)
+        scaler_file_entry = tk.Entry(scaler_file_frame, textvariable=self.scaler_file, font=default_font)
+        scaler_file_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=default_pad, pady=default_pad)
+
+        # Browse Button
+        create_button(scaler_file_frame, "Browse", self.browse_scaler_file)
+
         # Progress Frame
         progress_frame = tk.Frame(self.root, bg=frame_bg)
         progress_frame.pack(pady=default_pad, fill=tk.X, anchor="w")
@@ -116,9 +213,12 @@ class EEGFeatureNormalizationInterface:
         log_label.pack(anchor="center", padx=default_pad, pady=default_pad)
 
         # Log Box
-        self.log_box = scrolledtext.ScrolledText(log_frame, height=8, wrap=tk.WORD, bg="#F5F5F5", font=log_font)
+        self.log_box = uiChannel.LogBox(log_frame, height=8, wrap=tk.WORD, bg="#F5F5F5", font=log_font)
         self.log_box.pack(fill=tk.BOTH, expand=True)
 
+        # Channel carrying log and progress updates from the processing threads
+        self.channel = uiChannel.UiChannel(self.root, self.log_box, self.progress_bar)
+
         # Clear Button Frame
         clear_button_frame = tk.Frame(log_frame, bg=frame_bg)
         clear_button_frame.pack(fill=tk.X, pady=default_pad)
@@ -139,32 +239,56 @@ class EEGFeatureNormalizationInterface:
             self.output_dir.set(directory)
             self.log(f"Output directory set to: {os.path.normpath(directory)}")
 
+    def browse_registry(self):
+        directory = filedialog.askdirectory()
+        if directory:
+            self.registry_dir.set(directory)
+            self.log(f"Scaler registry set to: {os.path.normpath(directory)}")
+
+    def browse_scaler_file(self):
+        file = filedialog.askopenfilename(filetypes=[("Scaler Files", "*.pkl")])
+        if file:
+            self.scaler_file.set(file)
+            self.log(f"Scaler file set to: {os.path.normpath(file)}")
+
     def log(self, message):
-        self.log_box.insert(tk.END, message + "\n")
-        self.log_box.yview(tk.END)
+        self.channel.log(message)
+
+    def set_progress(self, value, maximum=None):
+        self.channel.set_progress(value, maximum)
+
+    def show_info(self, title, message):
+        self.channel.call(messagebox.showinfo, title, message)
 
     # Helper method to add csv to file list and file table, and log the number of files added
     def add_csv(self, files):
-        pattern = re.compile(r"P\d+.csv")
-        selected_value = self.selection_var.get()
+        kinds = ('normal_features', 'normal_dataset') if "Normal" in self.selection_var.get() else ('stroke_features',)
+
+        # Prefer the full-precision psd_summary.csv over the float32 feature file when a folder holds both
+        summary_dirs = {os.path.dirname(file) for file in files if file.endswith("psd_summary.csv")}
 
         for file in files:
-            file_valid = ("Normal" in selected_value and "psd_summary.csv" in file) or \
-                         ("Stroke" in selected_value and pattern.search(file))
+            if file.endswith(featureStore.FEATURES_FILENAME) and os.path.dirname(file) in summary_dirs:
+                continue
 
-            if file_valid:
+            if datasetCatalog.classify(file)[0] in kinds:
                 self.file_list.append(os.path.normpath(file))
                 self.file_table.insert("", tk.END, values=(os.path.normpath(file),))
-                self.log(f"Added file: {os.path.normpath(file)}")
+                if file.endswith('.npz'):
+                    self.log(f"Added file (float32 features, values rounded): {os.path.normpath(file)}")
+                else:
+                    self.log(f"Added file: {os.path.normpath(file)}")
+            else:
+                self.log(f"Skipped file (not a {self.selection_var.get()} feature file): {os.path.normpath(file)}")
 
     def add_directory(self):
         directory = filedialog.askdirectory()
         if directory:
-            files = [os.path.join(root, file) for root, _, file_list in os.walk(directory) for file in file_list]
-            self.add_csv(files)
+            kind = 'stroke_features' if "Stroke" in self.selection_var.get() else 'normal_features'
+            self.add_csv(datasetCatalog.select_files(self, directory, kind))
 
     def add_file(self):
-        file = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
+        file = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv"), ("NPZ Files", "*.npz")])
         if file:
             self.add_csv([file])
 
@@ -179,6 +303,7 @@ class EEGFeatureNormalizationInterface:
 
     def reset(self):
         self.file_list = []
+        self.file_metadata = {}
         for item in self.file_table.get_children():
             self.file_table.delete(item)
         self.progress_bar['value'] = 0
@@ -3,9 +3,12 @@ import os
 import subprocess
 import threading
 # import svmRbf
+import featureStore
 import svm
+import svmSearch
+import uiChannel
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext, ttk
+from tkinter import filedialog, messagebox, ttk
 
 class EEGClassificationInterface:
     def __init__(self, root):
@@ -108,6 +111,53 @@ class EEGClassificationInterface:
 
         create_button(button_frame, "Start", self.start_svm, side=tk.RIGHT)
 
+        # Dropdown (Grid/Halving search strategy)
+        self.strategy_var = tk.StringVar(value="Grid")
+        strategy_dropdown = tk.OptionMenu(button_frame, self.strategy_var, *svmSearch.STRATEGIES)
+        strategy_dropdown.config(width=button_width, bg=button_bg)
+        strategy_dropdown.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Dropdown (Quick/Full hyperparameter grid)
+        self.grid_var = tk.StringVar(value="Quick")
+        grid_dropdown = tk.OptionMenu(button_frame, self.grid_var, *svmSearch.GRIDS)
+        grid_dropdown.config(width=button_width, bg=button_bg)
+        grid_dropdown.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Jobs Spinbox (processes running the cross-validation fits)
+        self.jobs_var = tk.StringVar(value="1")
+        jobs_label = tk.Label(button_frame, text="Jobs:", bg=frame_bg, font=default_font)
+        jobs_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+        jobs_spinbox = tk.Spinbox(button_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.jobs_var, width=5,
+                                  font=default_font)
+        jobs_spinbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Time Budget Entry (seconds; 0 searches without a limit)
+        self.time_budget_var = tk.StringVar(value="0")
+        time_budget_label = tk.Label(button_frame, text="Budget (s):", bg=frame_bg, font=default_font)
+        time_budget_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+        time_budget_entry = tk.Entry(button_frame, textvariable=self.time_budget_var, width=8, font=default_font)
+        time_budget_entry.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Kernel Cache Checkbox (cross-validates RBF candidates on precomputed kernels shared across C and folds)
+        self.kernel_cache_var = tk.BooleanVar(value=False)
+        kernel_cache_checkbox = tk.Checkbutton(button_frame, text="Kernel Cache", variable=self.kernel_cache_var,
+                                               bg=frame_bg, font=default_font)
+        kernel_cache_checkbox.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Kernel Cache Limit Entry (MB; larger training sets compute their kernels on the fly)
+        self.kernel_cache_mb_var = tk.StringVar(value=str(svmSearch.KERNEL_CACHE_MAX_MB))
+        kernel_cache_mb_label = tk.Label(button_frame, text="Cache (MB):", bg=frame_bg, font=default_font)
+        kernel_cache_mb_label.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+        kernel_cache_mb_entry = tk.Entry(button_frame, textvariable=self.kernel_cache_mb_var, width=8,
+                                         font=default_font)
+        kernel_cache_mb_entry.pack(side=tk.LEFT, padx=default_pad, pady=default_pad)
+
+        # Profile Checkbox (logs a per-phase timing summary and saves a Chrome trace to the output directory)
+        self.profile_var = tk.BooleanVar(value=False)
+        profile_checkbox = tk.Checkbutton(button_frame, text="Profile", variable=self.profile_var, bg=frame_bg,
+                                          font=default_font)
+        profile_checkbox.pack(side=tk.RIGHT, padx=default_pad, pady=default_pad)
+
         # Progress Frame
         progress_frame = tk.Frame(self.root, bg=frame_bg)
         progress_frame.pack(pady=default_pad, fill=tk.X, anchor="w")
@@ -128,9 +178,12 @@ class EEGClassificationInterface:
         log_label.pack(anchor="center", padx=default_pad, pady=default_pad)
 
         # Log Box
-        self.log_box = scrolledtext.ScrolledText(log_frame, height=8, wrap=tk.WORD, bg="#F5F5F5", font=log_font)
+        self.log_box = uiChannel.LogBox(log_frame, height=8, wrap=tk.WORD, bg="#F5F5F5", font=log_font)
         self.log_box.pack(fill=tk.BOTH, expand=True)
 
+        # Channel carrying log and progress updates from the processing threads
+        self.channel = uiChannel.UiChannel(self.root, self.log_box, self.progress_bar)
+
         # Clear Button Frame
         clear_button_frame = tk.Frame(log_frame, bg=frame_bg)
         clear_button_frame.pack(fill=tk.X, pady=default_pad)
@@ -152,13 +205,15 @@ class EEGClassificationInterface:
             self.log(f"Output directory set to: {os.path.normpath(directory)}")
 
     def browse_train_data(self):
-        file = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
+        file = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv"), ("NPZ Files", "*.npz"),
+                                                     ("Columnar Tables", featureStore.COLUMNAR_META)])
         if file:
             self.train_data_path.set(file)
             self.log(f"Train data path set to: {os.path.normpath(file)}")
 
     def browse_test_data(self):
-        file = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
+        file = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv"), ("NPZ Files", "*.npz"),
+                                                     ("Columnar Tables", featureStore.COLUMNAR_META)])
         if file:
             self.test_data_path.set(file)
             self.log(f"Test data path set to: {os.path.normpath(file)}")
@@ -170,8 +225,10 @@ class EEGClassificationInterface:
             self.log(f"Model file path set to: {os.path.normpath(file)}")
 
     def log(self, message):
-        self.log_box.insert(tk.END, message + "\n")
-        self.log_box.yview(tk.END)
+        self.channel.log(message)
+
+    def set_progress(self, value, maximum=None):
+        self.channel.set_progress(value, maximum)
 
     def start_svm(self):
         if not self.train_data_path:
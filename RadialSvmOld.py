@@ -3,6 +3,8 @@ import pandas as pd
 from sklearn.svm import SVC
 import joblib
 
+import featureStore
+
 def train_svm(train_data_path, test_data_path, result_directory):
     """
     This function trains the SVM model using the provided training data and
@@ -34,11 +36,15 @@ def train_svm(train_data_path, test_data_path, result_directory):
 
 def load_data(file_path, is_train=True):
     """
-    This function loads the data from the specified CSV file, processes the
-    feature columns and returns the features and labels.
+    This function loads the data from the specified CSV file (or columnar table
+    written by the normalization stage), processes the feature columns and returns
+    the features and labels.
     """
-    # Load the CSV data
-    df = pd.read_csv(file_path)
+    # Load the CSV data, or memory-map the columnar table
+    if featureStore.columnar_dir(file_path):
+        df = featureStore.read_columnar(file_path)
+    else:
+        df = pd.read_csv(file_path)
 
     if is_train:
         # For training data, separate features and labels
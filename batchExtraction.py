@@ -0,0 +1,102 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import datasetCatalog
+import extractionManifest
+import extractNormalPSD
+import extractStrokePSD
+import featureStore
+import profiler
+import rawCache
+import regionMontage
+
+# Per-file extraction functions by dataset type
+PROCESS_FILE = {
+    'Normal': extractNormalPSD.process_file,
+    'Stroke': extractStrokePSD.process_file
+}
+
+
+def extract_file(selection, file, output_dir, options, profile=False):
+    """
+    Runs one file inside a worker process and returns its log messages, written files, windows
+    and, when profiling, the worker's profile events.
+    """
+    messages = [f"Processing: {os.path.normpath(file)}"]
+    stats = Counter()
+    if profile:
+        profiler.start()
+    try:
+        with profiler.phase('extract_file'):
+            outputs = PROCESS_FILE[selection](file, output_dir, log=messages.append, stats=stats, **options)
+    finally:
+        active = profiler.stop() if profile else None
+    return messages, outputs, stats['windows'], active.events if active else []
+
+
+@profiler.profiled('extract_batch')
+def process(self):
+    """
+    Fans the selected files out to a process pool. Each completed file is reported back
+    to the interface as it finishes, and a failing file is logged without stopping the batch.
+    """
+    # Initialize GUI elements
+    self.log("Starting processing...")
+    output_dir = self.output_dir.get()
+    selection = self.selection_var.get()
+    workers = int(self.workers_var.get())
+    options = {'cache': rawCache.get_cache(self)}
+    if selection == 'Normal':
+        montage_file = self.montage_file.get()
+        options.update(engine=self.engine_var.get(), shards=int(self.shards_var.get()),
+                       shard_by=self.shard_by_var.get(), streaming=self.streaming_var.get(),
+                       output_format=self.output_format_var.get(),
+                       montages=regionMontage.load_montages(montage_file) if montage_file else None)
+        parameters = extractNormalPSD.extraction_parameters(options['engine'], options['output_format'],
+                                                            options['montages'])
+    else:
+        options.update(gap_policy=self.gap_policy_var.get())
+        parameters = extractStrokePSD.extraction_parameters(options['gap_policy'])
+    file_list, manifest = extractionManifest.select_files(self, parameters)
+    self.set_progress(0, len(file_list))
+
+    failed_files = []
+    stats = Counter(files=0, windows=0)
+    profile = profiler.ACTIVE is not None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(extract_file, selection, file, output_dir,
+                                   {**options, 'description': datasetCatalog.describe(self, file)}
+                                   if selection == 'Stroke' else options, profile): file
+                   for file in file_list}
+
+        # Report each file as soon as its worker completes
+        for done, future in enumerate(as_completed(futures), start=1):
+            file = futures[future]
+            try:
+                messages, outputs, windows, events = future.result()
+                stats.update(files=1, windows=windows)
+                if profiler.ACTIVE:
+                    profiler.ACTIVE.merge(events)
+                for message in messages:
+                    self.log(message)
+                if manifest and outputs:
+                    manifest.record(file, outputs)
+            except Exception as error:
+                failed_files.append(file)
+                self.log(f"Error: Failed to process {os.path.normpath(file)}: {error}")
+
+            self.set_progress(done)
+            self.log(f"Completed {done}/{len(futures)} files")
+
+    # Combine the per-recording feature files into one dataset for the whole batch
+    if 'NPZ' in options.get('output_format', '') and featureStore.build_dataset(output_dir):
+        self.log(f"Saved {featureStore.DATASET_FILENAME} to {output_dir}")
+
+    stats['failed'] = len(failed_files)
+    if failed_files:
+        self.show_warning("Processing Complete",
+                          f"{len(failed_files)} of {len(file_list)} files failed. See the log for details.")
+    else:
+        self.show_info("Processing Complete", "All files processed and saved successfully!")
+    return stats
@@ -0,0 +1,236 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import batchExtraction
+import extractNormalPSD
+import extractStrokePSD
+import featureLoader
+import normalizeNormal
+import normalizeStroke
+import rawCache
+import scalerRegistry
+import streamingScalers
+import svm
+import svmSearch
+
+# Settings of every stage (config key -> interface attribute, default value)
+STAGE_SETTINGS = {
+    'extract': {
+        'selection': ('selection_var', 'Normal'),
+        'engine': ('engine_var', 'Vectorized'),
+        'workers': ('workers_var', os.cpu_count() or 1),
+        'shards': ('shards_var', 1),
+        'shard_by': ('shard_by_var', 'Channels'),
+        'streaming': ('streaming_var', False),
+        'cache': ('cache_var', False),
+        'cache_dir': ('cache_dir', rawCache.DEFAULT_CACHE_DIR),
+        'cache_size_mb': ('cache_size_var', rawCache.DEFAULT_MAX_MB),
+        'incremental': ('incremental_var', True),
+        'output_format': ('output_format_var', 'CSV'),
+        'montage_file': ('montage_file', ''),
+        'gap_policy': ('gap_policy_var', 'Drop'),
+        'profile': ('profile_var', False)
+    },
+    'normalize': {
+        'selection': ('selection_var', 'Normal'),
+        'scaler': ('scaler_var', 'Standard'),
+        'streaming': ('streaming_var', False),
+        'threads': ('threads_var', featureLoader.DEFAULT_THREADS),
+        'parser': ('parser_var', 'C'),
+        'grouped': ('grouped_var', False),
+        'workers': ('workers_var', 1),
+        'sketch_error': ('sketch_error_var', streamingScalers.DEFAULT_ERROR),
+        'registry': ('registry_var', False),
+        'registry_dir': ('registry_dir', scalerRegistry.DEFAULT_REGISTRY_DIR),
+        'scaler_file': ('scaler_file', ''),
+        'output_format': ('output_format_var', 'CSV'),
+        'profile': ('profile_var', False)
+    },
+    'svm': {
+        'train_data': ('train_data_path', ''),
+        'test_data': ('test_data_path', ''),
+        'model_file': ('model_file_path', ''),
+        'strategy': ('strategy_var', 'Grid'),
+        'grid': ('grid_var', 'Quick'),
+        'jobs': ('jobs_var', 1),
+        'time_budget': ('time_budget_var', 0),
+        'kernel_cache': ('kernel_cache_var', False),
+        'kernel_cache_mb': ('kernel_cache_mb_var', svmSearch.KERNEL_CACHE_MAX_MB),
+        'profile': ('profile_var', False)
+    }
+}
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CONFIG_ERROR = 2
+
+
+class Setting:
+    """Stands in for a Tk variable holding one stage setting."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class HeadlessInterface:
+    """
+    Provides what the stage functions read from an interface (file_list, file_metadata,
+    output_dir, the stage settings, log, set_progress and show_info/show_warning) without Tk.
+    """
+
+    def __init__(self, stage, log=print):
+        self.stage = stage['stage']
+        self.file_list = expand_files(stage.get('files', []))
+        self.file_metadata = {}
+        self.output_dir = Setting(stage['output_dir'])
+        for key, (attribute, default) in STAGE_SETTINGS[self.stage].items():
+            setattr(self, attribute, Setting(stage.get(key, default)))
+        self.progress = {'maximum': 0, 'value': 0}
+        self.warnings = []
+        self.write_log = log
+
+    def log(self, message):
+        self.write_log(message)
+
+    def set_progress(self, value, maximum=None):
+        if maximum is not None:
+            self.progress['maximum'] = maximum
+        self.progress['value'] = value
+
+    def show_info(self, title, message):
+        self.log(f"{title}: {message}")
+
+    def show_warning(self, title, message):
+        self.warnings.append(message)
+        self.log(f"Warning: {title}: {message}")
+
+
+def expand_files(patterns):
+    """Expands file paths and glob patterns (** included) into a sorted, duplicate-free list."""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        files += [os.path.normpath(match) for match in matches]
+    return list(dict.fromkeys(files))
+
+
+def validate_stage(stage):
+    """Raises ValueError for an unknown stage, unknown settings or missing required settings."""
+    name = stage.get('stage')
+    if name not in STAGE_SETTINGS:
+        raise ValueError(f"Unknown stage {name!r}; expected one of {', '.join(STAGE_SETTINGS)}.")
+
+    unknown = set(stage) - set(STAGE_SETTINGS[name]) - {'stage', 'files', 'output_dir'}
+    if unknown:
+        raise ValueError(f"Unknown settings for stage {name!r}: {', '.join(sorted(unknown))}.")
+    if not stage.get('output_dir'):
+        raise ValueError(f"Stage {name!r} needs an output_dir.")
+    if name == 'svm' and not (stage.get('train_data') and stage.get('test_data')):
+        raise ValueError("Stage 'svm' needs train_data and test_data.")
+    if name != 'svm' and not stage.get('files'):
+        raise ValueError(f"Stage {name!r} needs files.")
+
+
+def stage_function(interface):
+    """Picks the stage function the matching interface would start."""
+    if interface.stage == 'extract':
+        if int(interface.workers_var.get()) > 1:
+            return batchExtraction.process
+        return extractNormalPSD.process if interface.selection_var.get() == 'Normal' else extractStrokePSD.process
+    if interface.stage == 'normalize':
+        return normalizeNormal.process if interface.selection_var.get() == 'Normal' else normalizeStroke.process
+    return svm.process
+
+
+def run_stage(stage, log=print):
+    """
+    Runs one stage without Tk and returns its report: counts, elapsed seconds, throughput
+    (files/s, windows/s, rows/s) and whether it succeeded.
+    """
+    interface = HeadlessInterface(stage, log)
+    os.makedirs(interface.output_dir.get(), exist_ok=True)
+
+    started = time.perf_counter()
+    try:
+        stats = stage_function(interface)(interface) or {}
+        error = None
+    except Exception as exception:
+        stats, error = {}, f"{type(exception).__name__}: {exception}"
+        log(f"Error: Stage {interface.stage!r} failed: {error}")
+    seconds = time.perf_counter() - started
+
+    report = {'stage': interface.stage, 'seconds': seconds, **stats}
+    for unit in ('files', 'windows', 'rows'):
+        if unit in stats:
+            report[f'{unit}_per_s'] = stats[unit] / seconds if seconds else 0.0
+    report['ok'] = error is None and not interface.warnings
+    if error:
+        report['error'] = error
+    return report
+
+
+def format_report(report):
+    rates = ", ".join(f"{report[f'{unit}_per_s']:.1f} {unit}/s" for unit in ('files', 'windows', 'rows')
+                      if f'{unit}_per_s' in report)
+    status = "ok" if report['ok'] else "FAILED"
+    return f"[{report['stage']}] {status} in {report['seconds']:.2f} s ({rates or 'no throughput recorded'})"
+
+
+def run(config, log=print):
+    """
+    Runs the stages of a config ({"stages": [...]}) in order and returns their reports.
+    Stops at the first failing stage, since later stages read its outputs.
+    """
+    stages = config.get('stages', [])
+    for stage in stages:
+        validate_stage(stage)
+
+    reports = []
+    for stage in stages:
+        log(f"Running stage: {stage['stage']}")
+        report = run_stage(stage, log)
+        log(format_report(report))
+        reports.append(report)
+        if not report['ok']:
+            break
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the extraction, normalization and SVM stages without Tk.")
+    parser.add_argument("config", help="JSON config with a list of stages")
+    parser.add_argument("--report", help="Write the stage reports to this JSON file")
+    parser.add_argument("--quiet", action="store_true", help="Only print the stage reports")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.config) as handle:
+            config = json.load(handle)
+        reports = run(config, log=print if not args.quiet else lambda message: None)
+    except (OSError, ValueError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return EXIT_CONFIG_ERROR
+
+    if args.quiet:
+        for report in reports:
+            print(format_report(report))
+    if args.report:
+        with open(args.report, 'w') as handle:
+            json.dump(reports, handle, indent=2)
+
+    return EXIT_OK if all(report['ok'] for report in reports) else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+import batchRunner
+import datasetCatalog
+import extractNormalPSD
+import extractStrokePSD
+from extractNormalPSD import FREQUENCY_BANDS, FS, SUMMARY_COLUMNS
+
+# Parameters
+NUM_CHANNELS = 62
+CLASS_CODES = ['s', 'h', 'f', 'n']  # Filename codes read by extractNormalPSD.get_class_label
+STROKE_HEADER = ["TIME", "BETA L", "BETA R", "ALPHA R", "THETA R", "DELTA R", "ALPHA L", "THETA L", "DELTA L"]
+STROKE_UNITS = ["sec.", "A", "B", "B", "B", "B", "A", "A", "A"]
+STROKE_RATE = 8  # Rows per second in a stroke export
+SEVERITIES = ['minor', 'moderate', 'severe']
+EYES = ['Open eyes', 'Close eyes']
+RESULTS_DIR = "BenchmarkResults"
+
+# Default sizes: small enough for a quick run, every one configurable from the command line
+DEFAULTS = {
+    'recordings': 4,
+    'seconds': 60,
+    'stroke_files': 6,
+    'stroke_rows': 2000,
+    'gap_rate': 0.01,
+    'tables': 8,
+    'table_rows': 500,
+    'repeat': 1,
+    'seed': 0
+}
+
+
+def synthetic_recording(seconds, rng, num_channels=NUM_CHANNELS, fs=FS):
+    """A (channels, samples) recording: one sinusoid per band and channel over Gaussian noise."""
+    t = np.arange(int(seconds * fs)) / fs
+    data = rng.normal(scale=5.0, size=(num_channels, t.size))
+    for low, high in extractNormalPSD.BAND_EDGES.values():
+        freqs = rng.uniform(low, high, size=(num_channels, 1))
+        amplitudes = rng.uniform(5, 30, size=(num_channels, 1))
+        phases = rng.uniform(0, 2 * np.pi, size=(num_channels, 1))
+        data += amplitudes * np.sin(2 * np.pi * freqs * t + phases)
+    return data
+
+
+def write_recordings(directory, count, seconds, rng):
+    """Writes headerless channels x samples CSVs named like the Normal dataset (e.g. 1-3h.csv)."""
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for index in range(count):
+        file = os.path.join(directory, f"1-{index + 1}{CLASS_CODES[index % len(CLASS_CODES)]}.csv")
+        np.savetxt(file, synthetic_recording(seconds, rng), fmt='%.6f', delimiter=',')
+        files.append(file)
+    return files
+
+
+def synthetic_stroke_export(rows, gap_rate, rng):
+    """A stroke export table in the TIME,BETA L,... layout, with "===" in a gap_rate share of cells."""
+    values = np.round(rng.gamma(2.0, 3.0, size=(rows, len(STROKE_HEADER) - 1)), 2).astype(str)
+    values[rng.random(values.shape) < gap_rate] = "==="
+    times = np.char.mod('%.3f', np.arange(1, rows + 1) / STROKE_RATE)
+    return pd.DataFrame(np.column_stack([times, values]), columns=STROKE_HEADER)
+
+
+def write_stroke_exports(directory, count, rows, gap_rate, rng):
+    """Writes stroke exports as severity/P<n>_<age>/<eyes>/<code><n>.csv, both header rows included."""
+    files = []
+    for index in range(count):
+        patient = index + 1
+        eyes = EYES[index % len(EYES)]
+        folder = os.path.join(directory, SEVERITIES[index // len(EYES) % len(SEVERITIES)], f"P{patient}_50", eyes)
+        os.makedirs(folder, exist_ok=True)
+        file = os.path.join(folder, f"{'PO' if eyes == 'Open eyes' else 'CP'}{patient}.csv")
+        table = synthetic_stroke_export(rows, gap_rate, rng)
+        with open(file, 'w', newline='') as handle:
+            handle.write(",".join(STROKE_HEADER) + "\n" + ",".join(STROKE_UNITS) + "\n")
+            table.to_csv(handle, index=False, header=False)
+        files.append(file)
+    return files
+
+
+def write_feature_tables(directory, count, rows, rng):
+    """
+    Writes psd_summary.csv tables (8 band powers plus CLASS) for the Normal normalizer and
+    stroke feature tables (8 band powers) of one severity and eye condition for the Stroke one.
+    """
+    normal_files, stroke_files = [], []
+    for index in range(count):
+        labels = [extractNormalPSD.get_class_label(code) for code in CLASS_CODES]
+        summary = pd.DataFrame(rng.gamma(2.0, 50.0, size=(rows, len(SUMMARY_COLUMNS))), columns=SUMMARY_COLUMNS)
+        summary['CLASS'] = rng.choice(labels, size=rows)
+        folder = os.path.join(directory, 'normal', f"1-{index + 1}")
+        os.makedirs(folder, exist_ok=True)
+        normal_files.append(os.path.join(folder, 'psd_summary.csv'))
+        summary.to_csv(normal_files[-1], index=False)
+
+        folder = os.path.join(directory, 'stroke', 'minor', 'open eyes')
+        os.makedirs(folder, exist_ok=True)
+        stroke_files.append(os.path.join(folder, f"P{index + 1}.csv"))
+        pd.DataFrame(rng.gamma(2.0, 3.0, size=(rows, len(extractStrokePSD.COLUMNS))),
+                     columns=extractStrokePSD.COLUMNS).to_csv(stroke_files[-1], index=False)
+    return normal_files, stroke_files
+
+
+def benchmark_stages(work_dir, sizes, log):
+    """Generates the synthetic inputs in work_dir and runs every stage once, returning the stage reports."""
+    rng = np.random.default_rng(sizes['seed'])
+    recordings = write_recordings(os.path.join(work_dir, 'normal_raw'), sizes['recordings'], sizes['seconds'], rng)
+    exports = write_stroke_exports(os.path.join(work_dir, 'stroke_raw'), sizes['stroke_files'], sizes['stroke_rows'],
+                                   sizes['gap_rate'], rng)
+    normal_tables, stroke_tables = write_feature_tables(os.path.join(work_dir, 'tables'), sizes['tables'],
+                                                        sizes['table_rows'], rng)
+
+    out = os.path.join(work_dir, 'out')
+    stages = [
+        ('extract_normal', {'stage': 'extract', 'selection': 'Normal', 'files': recordings, 'workers': 1,
+                            'incremental': False, 'output_dir': os.path.join(out, 'normal')}),
+        ('extract_stroke', {'stage': 'extract', 'selection': 'Stroke', 'files': exports, 'workers': 1,
+                            'incremental': False, 'output_dir': os.path.join(out, 'stroke')}),
+        ('normalize_normal', {'stage': 'normalize', 'selection': 'Normal', 'files': normal_tables,
+                              'output_dir': os.path.join(out, 'normalized')}),
+        ('normalize_stroke', {'stage': 'normalize', 'selection': 'Stroke', 'files': stroke_tables,
+                              'output_dir': os.path.join(out, 'normalized')}),
+        ('svm', {'stage': 'svm', 'train_data': os.path.join(out, 'normalized', 'train_data.csv'),
+                 'test_data': os.path.join(out, 'normalized', 'minor_open_eyes_test_data.csv'),
+                 'output_dir': os.path.join(out, 'svm')})
+    ]
+
+    reports = []
+    for name, stage in stages:
+        report = batchRunner.run_stage(stage, log)
+        report['name'] = name
+        reports.append(report)
+    return reports
+
+
+def summarize_runs(runs):
+    """Per stage: the median and minimum seconds over repeated runs, with the median run's counts and rates."""
+    stages = []
+    for reports in zip(*runs):
+        seconds = [report['seconds'] for report in reports]
+        median_report = sorted(reports, key=lambda report: report['seconds'])[len(reports) // 2]
+        stages.append({**median_report, 'seconds': float(np.median(seconds)), 'min_seconds': min(seconds),
+                       'ok': all(report['ok'] for report in reports)})
+    total = sum(stage['seconds'] for stage in stages)
+    return stages, total
+
+
+def check_summary_golden(reference_dir, max_folders=None, tolerance=1e-9):
+    """
+    Rebuilds every psd_summary.csv in reference_dir (e.g. NormalOutput) from the reference band
+    PSD CSVs next to it and compares values (relative to the largest reference value) and classes.
+    """
+    folders = sorted(os.path.dirname(file) for file in glob.glob(os.path.join(reference_dir, '*', 'psd_summary.csv')))
+    worst = 0.0
+    for folder in folders[:max_folders]:
+        psd_results = {band: pd.read_csv(os.path.join(folder, f'{band}_psd.csv'), header=None).values.T
+                       for band in FREQUENCY_BANDS}
+        reference = pd.read_csv(os.path.join(folder, 'psd_summary.csv'))
+        summary = extractNormalPSD.summary_dataframe(extractNormalPSD.summarize_hemispheres(psd_results),
+                                                     extractNormalPSD.get_class_label(os.path.basename(folder)))
+        expected = reference[SUMMARY_COLUMNS].values
+        worst = max(worst, np.abs(summary[SUMMARY_COLUMNS].values.astype(float) - expected).max() /
+                    np.abs(expected).max())
+        if summary.shape != reference.shape or not (summary['CLASS'] == reference['CLASS']).all():
+            worst = np.inf
+    checked = len(folders[:max_folders])
+    return {'check': 'normal_summary', 'reference': reference_dir, 'checked': checked, 'max_rel_error': float(worst),
+            'tolerance': tolerance, 'ok': bool(checked > 0 and worst <= tolerance)}
+
+
+def check_extraction_golden(raw_dir, reference_dir, engine='Vectorized', max_files=None, tolerance=1e-9):
+    """
+    Extracts every raw recording in raw_dir that has a reference folder of the same name and
+    compares its band PSD and summary CSVs with the reference outputs.
+    """
+    files = sorted(file for file in glob.glob(os.path.join(raw_dir, '*.csv')) if
+                   os.path.isdir(os.path.join(reference_dir, os.path.splitext(os.path.basename(file))[0])))
+    worst = 0.0
+    with tempfile.TemporaryDirectory() as output_dir:
+        for file in files[:max_files]:
+            extractNormalPSD.process_file(file, output_dir, engine, log=lambda message: None)
+            name = os.path.splitext(os.path.basename(file))[0]
+            for output in [f'{band}_psd.csv' for band in FREQUENCY_BANDS]:
+                got = pd.read_csv(os.path.join(output_dir, name, output), header=None).values
+                expected = pd.read_csv(os.path.join(reference_dir, name, output), header=None).values
+                if got.shape != expected.shape:
+                    worst = np.inf
+                    continue
+                worst = max(worst, np.abs(got - expected).max() / np.abs(expected).max())
+    checked = len(files[:max_files])
+    return {'check': 'normal_extraction', 'engine': engine, 'reference': reference_dir, 'checked': checked,
+            'max_rel_error': float(worst), 'tolerance': tolerance, 'ok': bool(checked > 0 and worst <= tolerance)}
+
+
+def check_stroke_golden(dataset_dir, reference_dir, max_files=None, tolerance=1e-9):
+    """
+    Re-extracts the stroke exports of dataset_dir (e.g. StrokeDataset) and compares each one
+    with its output in reference_dir. Outputs claimed by more than one export (e.g. P6CE.csv
+    and P6CE6.csv both become P6.csv) cannot be told apart in the reference and are skipped
+    as ambiguous; mismatching exports are reported by name with their relative error.
+    """
+    claims = {}
+    for file in sorted(glob.glob(os.path.join(dataset_dir, '**', '*.csv'), recursive=True)):
+        description = datasetCatalog.describe_path(file)
+        if all(description.values()):
+            output = os.path.join(description['severity'], description['eye'], f"{description['subject']}.csv")
+            claims.setdefault(output, []).append(file)
+    ambiguous = sorted(os.path.relpath(file, dataset_dir) for files in claims.values() if len(files) > 1
+                       for file in files)
+
+    worst = 0.0
+    checked = 0
+    mismatched = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for output, files in sorted(claims.items()):
+            if len(files) > 1 or not os.path.exists(os.path.join(reference_dir, output)):
+                continue
+            if max_files is not None and checked >= max_files:
+                break
+            outputs = extractStrokePSD.process_file(files[0], output_dir, log=lambda message: None)
+            got, expected = pd.read_csv(outputs[0]).values, pd.read_csv(os.path.join(reference_dir, output)).values
+            if got.shape != expected.shape:
+                error = np.inf
+            else:
+                error = np.abs(got - expected).max() / max(np.abs(expected).max(), 1e-300)
+            if not error <= tolerance:
+                mismatched[os.path.relpath(files[0], dataset_dir)] = float(error)
+            worst = max(worst, error)
+            checked += 1
+    return {'check': 'stroke_extraction', 'reference': reference_dir, 'checked': checked, 'max_rel_error': float(worst),
+            'tolerance': tolerance, 'ambiguous': ambiguous, 'mismatched': mismatched,
+            'ok': bool(checked > 0 and worst <= tolerance)}
+
+
+def environment():
+    import scipy
+    import sklearn
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'scipy': scipy.__version__,
+            'sklearn': sklearn.__version__}
+
+
+def compare(results, baseline):
+    """Lines comparing each stage's median seconds with a previous results file."""
+    previous = {stage['name']: stage for stage in baseline['stages']}
+    lines = []
+    for stage in results['stages']:
+        if stage['name'] in previous and stage['seconds']:
+            ratio = previous[stage['name']]['seconds'] / stage['seconds']
+            lines.append(f"{stage['name']}: {previous[stage['name']]['seconds']:.3f} s -> "
+                         f"{stage['seconds']:.3f} s ({ratio:.2f}x)")
+    return lines
+
+
+def run(sizes=None, reference_dir='NormalOutput', raw_dir=None, stroke_dataset='StrokeDataset',
+        stroke_reference='StrokeOutput', golden_files=None, tolerance=1e-9, log=print):
+    """Runs the timed stages sizes['repeat'] times and the golden checks, returning the results dict."""
+    sizes = {**DEFAULTS, **(sizes or {})}
+    runs = []
+    for repeat in range(sizes['repeat']):
+        with tempfile.TemporaryDirectory() as work_dir:
+            runs.append(benchmark_stages(work_dir, sizes, lambda message: None))
+        log(f"Run {repeat + 1}/{sizes['repeat']}: " +
+            ", ".join(f"{report['name']} {report['seconds']:.3f} s" for report in runs[-1]))
+    stages, total = summarize_runs(runs)
+
+    golden = []
+    if reference_dir and os.path.isdir(reference_dir):
+        golden.append(check_summary_golden(reference_dir, golden_files, tolerance))
+        if raw_dir:
+            golden.append(check_extraction_golden(raw_dir, reference_dir, max_files=golden_files,
+                                                  tolerance=tolerance))
+    if stroke_dataset and stroke_reference and os.path.isdir(stroke_dataset) and os.path.isdir(stroke_reference):
+        golden.append(check_stroke_golden(stroke_dataset, stroke_reference, golden_files, tolerance))
+
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'sizes': sizes, 'environment': environment(),
+            'stages': stages, 'end_to_end_seconds': total, 'golden': golden}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every stage on synthetic data and check golden outputs.")
+    for key, value in DEFAULTS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    parser.add_argument("--reference-dir", default="NormalOutput", help="Reference Normal extraction outputs")
+    parser.add_argument("--raw-dir", help="Raw recordings of the reference outputs, to check full extraction")
+    parser.add_argument("--stroke-dataset", default="StrokeDataset")
+    parser.add_argument("--stroke-reference", default="StrokeOutput")
+    parser.add_argument("--golden-files", type=int, help="Limit the files checked per golden check")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="Maximum relative error of golden checks")
+    parser.add_argument("--output", help="Results JSON (default: BenchmarkResults/benchmark_<time>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to compare stage times with")
+    args = parser.parse_args(argv)
+
+    sizes = {key: getattr(args, key) for key in DEFAULTS}
+    results = run(sizes, args.reference_dir, args.raw_dir, args.stroke_dataset, args.stroke_reference,
+                  args.golden_files, args.tolerance)
+
+    for stage in results['stages']:
+        print(batchRunner.format_report(stage))
+    print(f"End to end: {results['end_to_end_seconds']:.3f} s")
+    for check in results['golden']:
+        print(f"Golden {check['check']}: {'ok' if check['ok'] else 'FAILED'} "
+              f"({check['checked']} checked, max relative error {check['max_rel_error']:.3g})")
+        if check.get('ambiguous'):
+            print(f"  Skipped {len(check['ambiguous'])} exports sharing a reference output: "
+                  + ", ".join(check['ambiguous']))
+        for name, error in check.get('mismatched', {}).items():
+            print(f"  Mismatch {name}: relative error {error:.3g}")
+    if args.compare:
+        with open(args.compare) as handle:
+            for line in compare(results, json.load(handle)):
+                print(line)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(results, handle, indent=2)
+    print(f"Saved results to {os.path.normpath(output)}")
+
+    ok = all(stage['ok'] for stage in results['stages']) and all(check['ok'] for check in results['golden'])
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
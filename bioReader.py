@@ -0,0 +1,46 @@
+import datetime
+import struct
+
+# Parameters
+MAGIC = b"BioBoard Archive"
+NAME_OFFSET = 0x1A  # Zero-padded session name, e.g. "Open eyes"
+NAME_SIZE = 0x96
+CHANNELS_OFFSET = 0xC0  # Per channel: enabled flag, channel index and samples per block (uint8, uint8, uint16)
+BLOCKS_OFFSET = 0xC8  # Block count (uint32), block size in bytes (uint16) and start time (uint32 Unix time)
+DATA_OFFSET = 0xD6
+EXPORT_ROWS_PER_BLOCK = 4  # Band-power rows (0.125 s each) the device software exports per block
+
+
+def read_header(file):
+    """
+    Reads the header of a native BioBoard .BIO archive: session name, channels with their
+    samples per block, block count and size, start time and the number of band-power rows
+    the device software exports for it (the .csv/.TXT exports of the same session).
+    """
+    with open(file, 'rb') as handle:
+        header = handle.read(DATA_OFFSET)
+    if len(header) < DATA_OFFSET or not header.startswith(MAGIC):
+        raise ValueError(f"{file} is not a BioBoard archive.")
+
+    channels = [{'index': index, 'enabled': bool(enabled), 'samples_per_block': samples}
+                for enabled, index, samples in struct.iter_unpack('<BBH', header[CHANNELS_OFFSET:BLOCKS_OFFSET])]
+    blocks, block_size, start = struct.unpack_from('<IHI', header, BLOCKS_OFFSET)
+    return {
+        'session': header[NAME_OFFSET:NAME_OFFSET + NAME_SIZE].split(b'\0', 1)[0].decode('latin-1'),
+        'channels': channels,
+        'blocks': blocks,
+        'block_size': block_size,
+        'start_time': datetime.datetime.fromtimestamp(start, datetime.timezone.utc),
+        'export_rows': blocks * EXPORT_ROWS_PER_BLOCK
+    }
+
+
+def read_band_powers(file, columns):
+    """
+    The archive stores the device's encoded signal blocks, not the band powers: those are
+    computed by the device software when it writes the .csv/.TXT exports, and its filters
+    are not documented. Reading band powers therefore still needs an export.
+    """
+    header = read_header(file)
+    raise ValueError(f"{file} holds {header['blocks']} encoded signal blocks, not band powers "
+                     f"({', '.join(columns)}); read the session's .csv or .TXT export instead.")
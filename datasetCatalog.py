@@ -0,0 +1,213 @@
+import hashlib
+import os
+import re
+import sqlite3
+
+import extractNormalPSD
+import featureStore
+import rawCache
+
+# Parameters
+DEFAULT_CATALOG_DIR = os.path.join(os.path.expanduser("~"), ".eeg_catalog")
+CATALOG_VERSION = 3  # Bumped whenever the catalogued metadata changes, so older catalogs are rebuilt
+FEATURE_COLUMNS = "ALPHA L,ALPHA R,BETA L,BETA R,DELTA L,DELTA R,THETA L,THETA R"
+SUMMARY_FILENAME = "psd_summary.csv"
+OUTPUT_TABLE = re.compile(r'.+_(psd|summary)\.csv$', re.IGNORECASE)  # Band PSD and montage tables of an output
+FIRST_LINE_CHARS = 4096  # Only this much of a .csv/.TXT's first line is read to classify it
+NUMERIC_FIELD = re.compile(r'\s*([-+]?((\d+\.?\d*|\.\d+)(E[-+]?\d*)?|NAN|INF(INITY)?))?\s*')
+
+# Readable formats of every kind, most preferred first (one format is picked per recording). Normal
+# features prefer the full-precision psd_summary.csv over the float32 feature file.
+PREFERRED_FORMATS = {
+    'stroke_export': ['csv', 'txt'],
+    'stroke_features': ['csv'],
+    'normal_raw': ['csv'],
+    'normal_features': ['csv', 'npz']
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    recording TEXT,
+    kind TEXT,
+    subject TEXT,
+    severity TEXT,
+    eye TEXT,
+    class TEXT,
+    format TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    hash TEXT
+)
+"""
+
+
+def describe_path(file):
+    """
+    Derives subject, severity and eye state from a path the way the stroke stages always have:
+    the first P<number> in the path, and minor/moderate/severe and open/close eyes in the
+    folder names. Missing parts are None.
+    """
+    file_dir = os.path.dirname(file).lower()
+    subject = re.search(r'P\d+', file)
+    severity = re.search(r'(minor|moderate|severe)', file_dir)
+    eye = "open eyes" if "open eyes" in file_dir else "close eyes" if "close eyes" in file_dir else None
+    return {'subject': subject.group() if subject else None, 'severity': severity.group(1) if severity else None,
+            'eye': eye}
+
+
+def classify(file):
+    """
+    Returns (kind, recording) of a file. Recordings group the files that hold the same data
+    in different formats: a stroke session folder, a Normal output folder or a raw recording.
+    The kind of a .csv/.TXT is decided from (at most FIRST_LINE_CHARS of) its first line;
+    a raw recording's first line holds only numbers (NaN/inf and blanks allowed). The band PSD
+    and montage tables of a Normal output folder are numeric too, so CSVs named like them or
+    next to a psd_summary.csv/feature file are 'other' files of that output's recording.
+    """
+    name = os.path.basename(file)
+    folder = os.path.dirname(file)
+    extension = os.path.splitext(name)[1].lower()
+
+    if name in (featureStore.FEATURES_FILENAME, SUMMARY_FILENAME):
+        return 'normal_features', folder
+    if name == featureStore.DATASET_FILENAME:
+        return 'normal_dataset', file
+    if extension in ('.bio', '.xlsx'):
+        return 'stroke_export', folder
+    if extension not in ('.csv', '.txt'):
+        return 'other', file
+    if extension == '.csv' and (OUTPUT_TABLE.match(name) or
+                                os.path.exists(os.path.join(folder, SUMMARY_FILENAME)) or
+                                os.path.exists(os.path.join(folder, featureStore.FEATURES_FILENAME))):
+        return 'other', folder
+
+    with open(file, errors='replace') as handle:
+        first_line = handle.readline(FIRST_LINE_CHARS)
+    truncated = len(first_line) == FIRST_LINE_CHARS and not first_line.endswith('\n')
+    first_line = first_line.strip().replace('"', '').upper()
+    if first_line.startswith('TIME,'):
+        return 'stroke_export', folder
+    if first_line == FEATURE_COLUMNS:
+        return 'stroke_features', file
+
+    # The last field of a truncated line may be cut mid-number
+    fields = first_line.split(',')[:-1] if truncated else first_line.split(',')
+    if any(field.strip() for field in fields) and all(NUMERIC_FIELD.fullmatch(field) for field in fields):
+        return 'normal_raw', os.path.splitext(file)[0]
+    return 'other', file
+
+
+class DatasetCatalog:
+    """
+    On-disk index (SQLite) of a dataset tree. Each file has its kind, recording, subject,
+    severity, eye state, emotion class, format, size, mtime and, with hash_contents, content
+    hash. update() only reads files whose size or mtime changed, and select() picks files by
+    kind and metadata, with one preferred format per recording.
+    """
+
+    def __init__(self, root, catalog_dir=DEFAULT_CATALOG_DIR, hash_contents=False):
+        self.root = os.path.abspath(root)
+        self.hash_contents = hash_contents
+        os.makedirs(catalog_dir, exist_ok=True)
+        self.catalog_file = os.path.join(catalog_dir, hashlib.sha1(self.root.encode()).hexdigest() +
+                                         f'.v{CATALOG_VERSION}.sqlite')
+        self.connection = sqlite3.connect(self.catalog_file)
+        self.connection.execute(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def update(self):
+        """Brings the catalog in line with the tree and returns the (added, updated, removed) counts."""
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in
+                 self.connection.execute("SELECT path, size, mtime_ns FROM files")}
+        seen = set()
+        added = updated = 0
+
+        for folder, _, files in os.walk(self.root):
+            for name in files:
+                file = os.path.join(folder, name)
+                path = os.path.relpath(file, self.root)
+                stat = os.stat(file)
+                seen.add(path)
+                if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+
+                kind, recording = classify(file)
+                description = describe_path(file)
+                class_label = extractNormalPSD.get_class_label(os.path.basename(recording)) \
+                    if kind.startswith('normal') else None
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, os.path.relpath(recording, self.root), kind, description['subject'],
+                     description['severity'], description['eye'], class_label,
+                     os.path.splitext(name)[1].lower().lstrip('.'), stat.st_size, stat.st_mtime_ns,
+                     rawCache.hash_file(file) if self.hash_contents else None))
+                if path in known:
+                    updated += 1
+                else:
+                    added += 1
+
+        removed = [(path,) for path in known if path not in seen]
+        self.connection.executemany("DELETE FROM files WHERE path = ?", removed)
+        self.connection.commit()
+        return added, updated, len(removed)
+
+    def select(self, kind, preferred=True, **filters):
+        """
+        Returns the absolute paths of the files of one kind matching the metadata filters
+        (subject, severity, eye, class), sorted by path. With preferred, every recording
+        contributes only its files in the most preferred format it has.
+        """
+        query = "SELECT path, recording, format FROM files WHERE kind = ?"
+        values = [kind]
+        for column, value in filters.items():
+            if column not in ('subject', 'severity', 'eye', 'class'):
+                raise ValueError(f"Unknown catalog filter {column!r}.")
+            query += f" AND {column} = ?"
+            values.append(value)
+        rows = self.connection.execute(query + " ORDER BY path", values).fetchall()
+
+        formats = PREFERRED_FORMATS.get(kind, [])
+        if preferred and formats:
+            rows = [row for row in rows if row[2] in formats]
+            best = {}
+            for _, recording, file_format in rows:
+                best[recording] = min(best.get(recording, len(formats)), formats.index(file_format))
+            rows = [row for row in rows if formats.index(row[2]) == best[row[1]]]
+        return [os.path.join(self.root, path) for path, _, _ in rows]
+
+    def records(self, kind=None):
+        """Every catalogued file (of one kind) as a dict, sorted by path."""
+        cursor = self.connection.execute("SELECT * FROM files" + (" WHERE kind = ?" if kind else "") +
+                                         " ORDER BY path", [kind] if kind else [])
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+
+def select_files(self, directory, kind):
+    """
+    Updates the catalog of a directory chosen in an interface, logs what changed and returns
+    its preferred files of one kind. Their catalogued subject, severity and eye state are kept
+    in the interface's file_metadata for the stage functions (see describe).
+    """
+    catalog = DatasetCatalog(directory)
+    try:
+        added, updated, removed = catalog.update()
+        self.log(f"Catalog: {added} files added, {updated} updated, {removed} removed")
+        files = catalog.select(kind)
+        records = {os.path.join(catalog.root, record['path']): record for record in catalog.records(kind)}
+        self.file_metadata.update({os.path.normpath(file): {column: records[file][column] for column in
+                                                            ('subject', 'severity', 'eye')} for file in files})
+        return files
+    finally:
+        catalog.close()
+
+
+def describe(self, file):
+    """
+    Subject, severity and eye state of a file in an interface's file list: the catalogued ones
+    when it was added from a catalogued directory, otherwise derived from its path.
+    """
+    return self.file_metadata.get(os.path.normpath(file)) or describe_path(file)
@@ -1,119 +1,471 @@
 import numpy as np
 import pandas as pd
 import os
-from scipy.fft import fft
-from scipy.signal import cheby2, filtfilt
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import fft, rfft
+from scipy.signal import cheby2, filtfilt, get_window
+
+import extractionManifest
+import featureStore
+import profiler
+import rawCache
+import regionMontage
+import streamingReader
+
+# Parameters
+WINDOW_SIZE = 128
+OVERLAP = 50  # 50% overlap
+WINDOW_WIDTH = int(np.ceil(WINDOW_SIZE - WINDOW_SIZE * OVERLAP / 100))  # Step size
+FS = 256  # Sampling frequency
+FFT_BINS = 50  # Number of FFT bins searched for the peak power
+FRAMES_PER_BLOCK = 512  # Frames filtered at once by the vectorized engine
+
+# Frequency bands and their edges in Hz
+FREQUENCY_BANDS = ['delta', 'theta', 'alpha', 'beta']
+BAND_EDGES = {
+    'delta': (0.5, 4),
+    'theta': (4, 7),
+    'alpha': (8, 12),
+    'beta': (13, 30)
+}
+
+# Summary columns (as written by the original extraction, in FREQUENCY_BANDS order of left/right pairs)
+SUMMARY_COLUMNS = ["ALPHA L", "ALPHA R", "BETA L", "BETA R", "DELTA L", "DELTA R", "THETA L", "THETA R"]
+
+# Output formats: per-band/summary CSVs, compressed float32 .npz, or both
+OUTPUT_FORMATS = ['CSV', 'NPZ', 'CSV+NPZ']
+
+# Hemisphere mapping (1-based indices)
+HEMISPHERE_MAP = {
+    'left': np.array(
+        [1, 3, 4, 8, 9, 12, 13, 17, 18, 19, 23, 24, 28, 29, 33, 35, 36, 39, 42, 45, 46, 47, 48, 49, 55, 57, 58,
+         61]) - 1,
+    'right': np.array(
+        [2, 6, 7, 10, 11, 15, 16, 20, 21, 22, 26, 27, 31, 32, 34, 37, 38, 41, 43, 50, 51, 52, 53, 54, 56, 59,
+         60, 62]) - 1
+}
+
+# Montage behind psd_summary.csv; custom montages are summarized alongside it under their own names
+HEMISPHERE_MONTAGE = {'hemisphere': HEMISPHERE_MAP}
+
+
+def design_filters(fs=FS):
+    """Builds the Chebyshev type II band-pass filter for every frequency band."""
+    wn = fs / 2  # Nyquist frequency
+    return {band: cheby2(2, 40, [low / wn, high / wn], btype='band') for band, (low, high) in BAND_EDGES.items()}
+
+
+FILTERS = design_filters()
+
+
+def design_band_bins(nfft=FS, fs=FS):
+    """Maps every frequency band to the slice of FFT bins that lies within its edges."""
+    freqs = np.fft.rfftfreq(nfft, 1 / fs)
+    band_bins = {}
+    for band, (low, high) in BAND_EDGES.items():
+        bins = np.flatnonzero((freqs >= low) & (freqs <= high))
+        band_bins[band] = slice(bins[0], bins[-1] + 1)
+    return band_bins
+
+
+BAND_BINS = design_band_bins()
+
+# Hann window for the spectral engine, scaled so peak powers keep the rectangular-window magnitude
+SPECTRAL_WINDOW = get_window('hann', WINDOW_SIZE) * WINDOW_SIZE / get_window('hann', WINDOW_SIZE).sum()
+
+
+def frame_signal(data, window_size=WINDOW_SIZE, window_width=WINDOW_WIDTH):
+    """
+    Returns a read-only (channels, frames, window_size) view of every analysis window,
+    using the same frame count as the legacy loop (only windows that fit entirely).
+    """
+    num_channels, num_samples = data.shape
+    if num_samples < window_size:
+        return np.empty((num_channels, 0, window_size))
+    return sliding_window_view(data, window_size, axis=-1)[:, ::window_width, :]
+
+
+def compute_psd_loop(data):
+    """
+    Legacy engine: filters and FFTs every window of every channel one at a time.
+    Returns a dict of (channels, frames) peak power matrices per band.
+    """
+    num_channels, num_samples = data.shape
+
+    # Storage for PSD results per frequency band
+    psd_results = {band: [] for band in FREQUENCY_BANDS}
+
+    # Process each EEG channel
+    for ch_index in range(num_channels):
+        channel_data = data[ch_index, :]
+        total_frames = int(np.ceil(num_samples / WINDOW_WIDTH)) - 1
+
+        # Storage for channel-specific PSD results per frequency band
+        psd_channel = {band: [] for band in FREQUENCY_BANDS}
+
+        # Process each data frame
+        for frame in range(total_frames + 1):
+            start, end = frame * WINDOW_WIDTH, frame * WINDOW_WIDTH + WINDOW_SIZE
+            if end > num_samples:
+                break
+
+            data_frame = channel_data[start:end]
+
+            # Apply filter and computer fft
+            for band, (b, a) in FILTERS.items():
+                filtered_data = filtfilt(b, a, data_frame)
+                fft_result = np.abs(fft(filtered_data, FS)[:FFT_BINS])
+                psd_channel[band].append(np.max(np.square(fft_result)))
+
+        # Store PSD results per band
+        for band in FREQUENCY_BANDS:
+            psd_results[band].append(psd_channel[band])
+
+    return {band: np.array(psd_results[band]).reshape(num_channels, -1) for band in FREQUENCY_BANDS}
+
+
+def compute_psd_vectorized(data):
+    """
+    Vectorized engine: frames all channels at once and filters/FFTs each band as one
+    batched operation along the last axis. Matches compute_psd_loop to a relative
+    tolerance of 1e-9 (differences are floating point rounding only).
+    """
+    frames = frame_signal(data)
+    num_channels, num_frames, _ = frames.shape
+    psd_results = {band: np.empty((num_channels, num_frames)) for band in FREQUENCY_BANDS}
+
+    # Work through the frames in blocks to bound the size of the filtered copies
+    for start in range(0, num_frames, FRAMES_PER_BLOCK):
+        block = frames[:, start:start + FRAMES_PER_BLOCK, :]
+        for band, (b, a) in FILTERS.items():
+            with profiler.phase('filtfilt'):
+                filtered_data = filtfilt(b, a, block, axis=-1)
+            with profiler.phase('fft'):
+                fft_result = np.abs(rfft(filtered_data, FS, axis=-1)[..., :FFT_BINS])
+                psd_results[band][:, start:start + FRAMES_PER_BLOCK] = np.max(np.square(fft_result), axis=-1)
+
+    return psd_results
+
+
+def compute_psd_spectral(data):
+    """
+    Spectral engine: computes one Hann-windowed FFT per frame and takes every band's
+    power as the peak squared magnitude within that band's bins (BAND_BINS). Values are
+    not expected to match the filtered engines, since bands are separated by bin ranges
+    instead of band-pass filters.
+    """
+    frames = frame_signal(data)
+    num_channels, num_frames, _ = frames.shape
+    psd_results = {band: np.empty((num_channels, num_frames)) for band in FREQUENCY_BANDS}
+
+    for start in range(0, num_frames, FRAMES_PER_BLOCK):
+        block = frames[:, start:start + FRAMES_PER_BLOCK, :]
+        with profiler.phase('fft'):
+            power = np.square(np.abs(rfft(block * SPECTRAL_WINDOW, FS, axis=-1)))
+            for band in FREQUENCY_BANDS:
+                psd_results[band][:, start:start + FRAMES_PER_BLOCK] = np.max(power[..., BAND_BINS[band]], axis=-1)
+
+    return psd_results
+
+
+# Selectable PSD engines (name shown in the interface -> implementation)
+ENGINES = {
+    'Vectorized': compute_psd_vectorized,
+    'Spectral': compute_psd_spectral,
+    'Loop': compute_psd_loop
+}
+
+
+def count_frames(num_samples, window_size=WINDOW_SIZE, window_width=WINDOW_WIDTH):
+    """Number of complete analysis windows in a recording of num_samples samples."""
+    return 0 if num_samples < window_size else (num_samples - window_size) // window_width + 1
+
+
+def shard_ranges(length, shards):
+    """Splits range(length) into at most `shards` contiguous, non-empty (start, stop) ranges."""
+    bounds = np.linspace(0, length, max(1, min(shards, length)) + 1).astype(int)
+    return [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
 
-def process(self):
-    # Parameters
-    window_size = 128
-    overlap = 50  # 50% overlap
-    window_width = int(np.ceil(window_size - window_size * overlap / 100))  # Step size
-    Fs = 256  # Sampling frequency
-    wn = Fs / 2  # Nyquist frequency
-
-    # Define frequency bands and filters
-    frequency_bands = ['delta', 'theta', 'alpha', 'beta']
-    filters = {
-        'delta': cheby2(2, 40, [0.5 / wn, 4 / wn], btype='band'),
-        'theta': cheby2(2, 40, [4 / wn, 7 / wn], btype='band'),
-        'alpha': cheby2(2, 40, [8 / wn, 12 / wn], btype='band'),
-        'beta': cheby2(2, 40, [13 / wn, 30 / wn], btype='band')
-    }
 
-    # Hemisphere mapping (1-based indices)
-    hemisphere_map = {
-        'left': np.array(
-            [1, 3, 4, 8, 9, 12, 13, 17, 18, 19, 23, 24, 28, 29, 33, 35, 36, 39, 42, 45, 46, 47, 48, 49, 55, 57, 58,
-             61]) - 1,
-        'right': np.array(
-            [2, 6, 7, 10, 11, 15, 16, 20, 21, 22, 26, 27, 31, 32, 34, 37, 38, 41, 43, 50, 51, 52, 53, 54, 56, 59,
-             60, 62]) - 1
+def split_recording(data, shards, shard_by='Channels'):
+    """
+    Splits a (channels, samples) recording into shards and returns them with the frame matrix
+    axis to reassemble along. Time shards are cut on frame boundaries and overlap by
+    WINDOW_SIZE - WINDOW_WIDTH samples, so every frame is computed exactly once.
+    """
+    num_channels, num_samples = data.shape
+    if shard_by == 'Channels':
+        return [data[start:stop] for start, stop in shard_ranges(num_channels, shards)], 0
+
+    pieces = [data[:, start * WINDOW_WIDTH:(stop - 1) * WINDOW_WIDTH + WINDOW_SIZE]
+              for start, stop in shard_ranges(count_frames(num_samples), shards)]
+    return pieces or [data], 1
+
+
+def compute_psd_sharded(data, engine='Vectorized', shards=1, shard_by='Channels', use_processes=False):
+    """
+    Computes one recording's PSD matrices with its channels or time range split across
+    worker threads (or processes), then reassembles the (channels, frames) band matrices.
+    """
+    compute_psd = ENGINES[engine]
+    pieces, axis = split_recording(data, shards, shard_by)
+    if len(pieces) == 1:
+        return compute_psd(data)
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=len(pieces)) as executor:
+        shard_results = list(executor.map(compute_psd, pieces))
+
+    return {band: np.concatenate([result[band] for result in shard_results], axis=axis) for band in FREQUENCY_BANDS}
+
+
+def extraction_parameters(engine='Vectorized', output_format='CSV', montages=None):
+    """Every setting that affects the extracted outputs, fingerprinted by the incremental manifest."""
+    return {
+        'selection': 'Normal',
+        'engine': engine,
+        'output_format': output_format,
+        'window_size': WINDOW_SIZE,
+        'overlap': OVERLAP,
+        'fs': FS,
+        'fft_bins': FFT_BINS,
+        'band_edges': BAND_EDGES,
+        'filters': {band: [b.tolist(), a.tolist()] for band, (b, a) in FILTERS.items()},
+        'hemisphere_map': {side: channels.tolist() for side, channels in HEMISPHERE_MAP.items()},
+        'montages': {name: {region: channels if isinstance(channels, list) else
+                            {str(channel): weight for channel, weight in channels.items()}
+                            for region, channels in regions.items()}
+                     for name, regions in (montages or {}).items()}
     }
 
-    # Initialize GUI elements
-    self.log("Starting processing...")
-    output_dir = self.output_dir.get()
-    self.progress_bar['maximum'] = len(self.file_list)
-    self.progress_bar['value'] = 0
 
-    # Process each EEG datasets
-    for idx, file in enumerate(self.file_list):
-        self.progress_bar['value'] = idx + 1
-        self.root.update_idletasks()
-        self.log(f"Processing: {os.path.normpath(file)}")
+def output_files(file_output_dir, montages=None):
+    """Paths of the band PSD and summary CSVs written for one recording."""
+    return [os.path.join(file_output_dir, f'{band}_psd.csv') for band in FREQUENCY_BANDS] + \
+        [os.path.join(file_output_dir, 'psd_summary.csv')] + \
+        [os.path.join(file_output_dir, f'{name}_summary.csv') for name in montages or {}]
+
+
+def compile_summary_montages(num_channels, montages=None):
+    """Compiles the hemisphere montage and any custom montages into one aggregation matrix."""
+    reserved = [name for name in montages or {} if name.lower() in regionMontage.RESERVED_NAMES]
+    if reserved:
+        raise ValueError(f"Custom montages cannot be named {', '.join(reserved)}.")
+    return regionMontage.compile_montages({**(montages or {}), **HEMISPHERE_MONTAGE}, num_channels)
+
+
+def summarize_regions(psd_results, compiled_montages):
+    """Aggregates every band over the regions of each compiled montage, {montage: (frames, bands * regions)}."""
+    return regionMontage.apply_montages(psd_results, FREQUENCY_BANDS, *compiled_montages)
+
 
-        # Read EEG data
-        df = pd.read_csv(file, header=None).values
-        num_channels, num_samples = df.shape
+def summarize_hemispheres(psd_results):
+    """Averages every band over the left and right hemisphere channels, shape: (frames, 8)."""
+    num_channels = psd_results[FREQUENCY_BANDS[0]].shape[0]
+    return summarize_regions(psd_results, compile_summary_montages(num_channels))['hemisphere']
 
-        # Create output directory
-        file_base_name = os.path.splitext(os.path.basename(file))[0]
-        file_output_dir = os.path.join(output_dir, file_base_name)
-        os.makedirs(file_output_dir, exist_ok=True)
 
-        # Storage for PSD results per frequency band
-        psd_results = {band: [] for band in frequency_bands}
+def montage_dataframe(region_summary, regions, class_label):
+    """Builds a {montage}_summary.csv table from a montage's region summary and the class label."""
+    return summary_dataframe(region_summary, class_label, regionMontage.region_columns(FREQUENCY_BANDS, regions))
 
-        # Process each EEG channel
-        for ch_index in range(num_channels):
-            channel_data = df[ch_index, :]
-            total_frames = int(np.ceil(num_samples / window_width)) - 1
 
-            # Storage for channel-specific PSD results per frequency band
-            psd_channel = {band: [] for band in frequency_bands}
+def get_class_label(file_base_name):
+    """Determines the emotion class from the recording's filename."""
+    class_mapping = {'s': 'sad', 'h': 'happy', 'f': 'fear', 'n': 'neutral'}
+    return next((class_mapping[c] for c in class_mapping if c in file_base_name), None)
 
-            # Process each data frame
-            for frame in range(total_frames + 1):
-                start, end = frame * window_width, frame * window_width + window_size
-                if end > num_samples:
-                    break
 
-                data_frame = channel_data[start:end]
+def summary_dataframe(final_summary, class_label, columns=SUMMARY_COLUMNS):
+    """Builds the psd_summary.csv table from the hemisphere summary and the class label."""
+    class_column = [class_label] * final_summary.shape[0]
+    return pd.DataFrame(np.column_stack([final_summary, class_column]), columns=columns + ["CLASS"])
 
-                # Apply filter and computer fft
-                for band, (b, a) in filters.items():
-                    filtered_data = filtfilt(b, a, data_frame)
-                    fft_result = np.abs(fft(filtered_data, Fs)[:50])
-                    psd_channel[band].append(np.max(np.square(fft_result)))
 
-            # Store PSD results per band
-            for band in frequency_bands:
-                psd_results[band].append(psd_channel[band])
+def process_file(file, output_dir, engine='Vectorized', log=print, shards=1, shard_by='Channels',
+                 streaming=False, cache=None, output_format='CSV', montages=None, stats=None):
+    """
+    Extracts the band PSD matrices and hemisphere summary of one EEG recording and returns
+    the written file paths. With a rawCache.RawCache the recording is read through its
+    memory-mapped binary copy. output_format is one of OUTPUT_FORMATS, and every custom
+    montage ({name: {region: channels}}, see regionMontage) adds a {name}_summary table.
+    The number of extracted windows is added to stats['windows'] when a Counter is given.
+    """
+    if streaming:
+        if output_format != 'CSV':
+            log("Warning: Streaming extraction writes CSV output only.")
+        return process_file_streaming(file, output_dir, engine, log, shards, shard_by, cache=cache,
+                                      montages=montages, stats=stats)
 
+    # Read EEG data
+    with profiler.phase('read'):
+        df = cache.load_eeg(file) if cache else pd.read_csv(file, header=None).values
+
+    # Create output directory
+    file_base_name = os.path.splitext(os.path.basename(file))[0]
+    file_output_dir = os.path.join(output_dir, file_base_name)
+    os.makedirs(file_output_dir, exist_ok=True)
+
+    # Compute PSD results per frequency band, shape: (62, frames)
+    with profiler.phase('psd'):
+        psd_results = compute_psd_sharded(df, engine, shards, shard_by)
+
+    # Compute hemisphere-based and custom region summaries in one pass
+    with profiler.phase('summary'):
+        compiled_montages = compile_summary_montages(df.shape[0], montages)
+        region_summaries = summarize_regions(psd_results, compiled_montages)
+    final_summary = region_summaries.pop('hemisphere')
+    class_label = get_class_label(file_base_name)
+    outputs = []
+    if stats is not None:
+        stats['windows'] += final_summary.shape[0]
+
+    if 'CSV' in output_format:
         # Save PSD results per band to csv
-        for band in frequency_bands:
+        for band in FREQUENCY_BANDS:
             band_file_path = os.path.join(file_output_dir, f'{band}_psd.csv')
-            pd.DataFrame(np.array(psd_results[band]).T).to_csv(band_file_path, index=False, header=False)
-            self.log(f"Saved {band}_psd.csv to {file_output_dir}")
-
-        # Compute hemisphere-based summary
-        summary_data = {band: {'left': [], 'right': []} for band in frequency_bands}
-        for band in frequency_bands:
-            band_matrix = np.array(psd_results[band])  # Shape: (62, frames)
-            left_values = band_matrix[hemisphere_map['left'], :]
-            right_values = band_matrix[hemisphere_map['right'], :]
-
-            for frame in range(band_matrix.shape[1]):
-                summary_data[band]['left'].append(np.mean(left_values[:, frame]))
-                summary_data[band]['right'].append(np.mean(right_values[:, frame]))
-
-        # Create final summary data
-        final_summary = np.hstack([
-            np.column_stack([summary_data[band]['left'], summary_data[band]['right']])
-            for band in frequency_bands
-        ])
-
-        # Determine emotion class from filename
-        class_mapping = {'s': 'sad', 'h': 'happy', 'f': 'fear', 'n': 'neutral'}
-        class_label = next((class_mapping[c] for c in class_mapping if c in file_base_name), None)
-        class_column = [class_label] * final_summary.shape[0]
+            with profiler.phase('write_csv'):
+                pd.DataFrame(psd_results[band].T).to_csv(band_file_path, index=False, header=False)
+            log(f"Saved {band}_psd.csv to {file_output_dir}")
 
         # Save the final summary CSV
-        columns = ["ALPHA L", "ALPHA R", "BETA L", "BETA R", "DELTA L", "DELTA R", "THETA L", "THETA R", "CLASS"]
         summary_file = os.path.join(file_output_dir, 'psd_summary.csv')
-        summary_df = pd.DataFrame(np.column_stack([final_summary, class_column]), columns=columns)
-        summary_df.to_csv(summary_file, index=False)
-        self.log(f"Saved psd_summary.csv to {file_output_dir}")
+        with profiler.phase('write_csv'):
+            summary_dataframe(final_summary, class_label).to_csv(summary_file, index=False)
+        log(f"Saved psd_summary.csv to {file_output_dir}")
+
+        # Save every custom montage summary CSV
+        for name, region_summary in region_summaries.items():
+            montage_file = os.path.join(file_output_dir, f'{name}_summary.csv')
+            with profiler.phase('write_csv'):
+                montage_dataframe(region_summary, compiled_montages[1][name][1], class_label).to_csv(montage_file,
+                                                                                                    index=False)
+            log(f"Saved {name}_summary.csv to {file_output_dir}")
+        outputs += output_files(file_output_dir, montages)
+
+    if 'NPZ' in output_format:
+        with profiler.phase('write_npz'):
+            outputs.append(featureStore.write_features(file_output_dir, psd_results, final_summary,
+                                                       SUMMARY_COLUMNS, class_label, region_summaries))
+        log(f"Saved {featureStore.FEATURES_FILENAME} to {file_output_dir}")
+
+    return outputs
+
+
+def process_file_streaming(file, output_dir, engine='Vectorized', log=print, shards=1, shard_by='Channels',
+                           chunk_samples=streamingReader.CHUNK_SAMPLES, cache=None, montages=None, stats=None):
+    """
+    Streaming variant of process_file: reads the recording in sample chunks and appends each
+    chunk's PSD frames to the output files, so peak memory does not grow with recording length.
+    Every window is filtered on its own, so the only context carried between chunks is the
+    WINDOW_SIZE - WINDOW_WIDTH samples of overlap (plus any samples short of a full window).
+    Samples are parsed exactly, so values can differ from pandas' default parser in the last digit.
+    """
+    # Create output directory
+    file_base_name = os.path.splitext(os.path.basename(file))[0]
+    file_output_dir = os.path.join(output_dir, file_base_name)
+    os.makedirs(file_output_dir, exist_ok=True)
+    class_label = get_class_label(file_base_name)
+
+    # Read EEG data chunk by chunk, from the memory-mapped cache entry when one is given
+    if cache:
+        data = cache.load_eeg(file)
+        chunks = (data[:, start:start + chunk_samples] for start in range(0, data.shape[1], chunk_samples))
+    else:
+        chunks = streamingReader.iter_sample_chunks(file, chunk_samples)
+
+    band_files = {band: open(os.path.join(file_output_dir, f'{band}_psd.csv'), 'w', newline='')
+                  for band in FREQUENCY_BANDS}
+    summary_file = open(os.path.join(file_output_dir, 'psd_summary.csv'), 'w', newline='')
+    montage_files = {name: open(os.path.join(file_output_dir, f'{name}_summary.csv'), 'w', newline='')
+                     for name in montages or {}}
+    compiled_montages = None
+    try:
+        summary_dataframe(np.empty((0, len(SUMMARY_COLUMNS))), class_label).to_csv(summary_file, index=False)
+
+        carry = None
+        while True:
+            with profiler.phase('read'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            buffer = chunk if carry is None else np.hstack([carry, chunk])
+            num_frames = count_frames(buffer.shape[1])
+            if num_frames == 0:
+                carry = buffer
+                continue
+
+            # Compute every complete window, keep the samples the next window starts from
+            with profiler.phase('psd'):
+                psd_results = compute_psd_sharded(buffer[:, :(num_frames - 1) * WINDOW_WIDTH + WINDOW_SIZE],
+                                                  engine, shards, shard_by)
+            carry = buffer[:, num_frames * WINDOW_WIDTH:]
+            if stats is not None:
+                stats['windows'] += num_frames
+
+            with profiler.phase('write_csv'):
+                for band in FREQUENCY_BANDS:
+                    pd.DataFrame(psd_results[band].T).to_csv(band_files[band], index=False, header=False)
+
+            # Compile the montages once, on the first chunk that has complete windows
+            if compiled_montages is None:
+                compiled_montages = compile_summary_montages(buffer.shape[0], montages)
+                for name, montage_file in montage_files.items():
+                    regions = compiled_montages[1][name][1]
+                    montage_dataframe(np.empty((0, len(FREQUENCY_BANDS) * len(regions))), regions,
+                                      class_label).to_csv(montage_file, index=False)
+
+            with profiler.phase('summary'):
+                region_summaries = summarize_regions(psd_results, compiled_montages)
+            with profiler.phase('write_csv'):
+                summary_dataframe(region_summaries.pop('hemisphere'), class_label).to_csv(summary_file,
+                                                                                         index=False, header=False)
+                for name, region_summary in region_summaries.items():
+                    montage_dataframe(region_summary, compiled_montages[1][name][1], class_label).to_csv(
+                        montage_files[name], index=False, header=False)
+    finally:
+        for output_file in [*band_files.values(), summary_file, *montage_files.values()]:
+            output_file.close()
+
+    for band in FREQUENCY_BANDS:
+        log(f"Saved {band}_psd.csv to {file_output_dir}")
+    log(f"Saved psd_summary.csv to {file_output_dir}")
+    for name in montage_files:
+        log(f"Saved {name}_summary.csv to {file_output_dir}")
+    return output_files(file_output_dir, montages)
+
+
+@profiler.profiled('extract_normal')
+def process(self):
+    # Initialize GUI elements
+    self.log("Starting processing...")
+    output_dir = self.output_dir.get()
+    engine = self.engine_var.get()
+    shards = int(self.shards_var.get())
+    shard_by = self.shard_by_var.get()
+    streaming = self.streaming_var.get()
+    cache = rawCache.get_cache(self)
+    output_format = self.output_format_var.get()
+    montages = regionMontage.load_montages(self.montage_file.get()) if self.montage_file.get() else None
+    file_list, manifest = extractionManifest.select_files(self, extraction_parameters(engine, output_format,
+                                                                                      montages))
+    self.set_progress(0, len(file_list))
+
+    # Process each EEG datasets
+    stats = Counter(files=len(file_list), windows=0)
+    for idx, file in enumerate(file_list):
+        self.set_progress(idx + 1)
+        self.log(f"Processing: {os.path.normpath(file)}")
+        outputs = process_file(file, output_dir, engine, self.log, shards, shard_by, streaming, cache, output_format,
+                               montages, stats)
+        if manifest:
+            manifest.record(file, outputs)
+
+    # Combine the per-recording feature files into one dataset for the whole batch
+    if 'NPZ' in output_format and featureStore.build_dataset(output_dir):
+        self.log(f"Saved {featureStore.DATASET_FILENAME} to {output_dir}")
 
-    messagebox.showinfo("Processing Complete", "All files processed and saved successfully!")
\ No newline at end of file
+    self.show_info("Processing Complete", "All files processed and saved successfully!")
+    return stats
@@ -1,69 +1,104 @@
 import os
-import re
+from collections import Counter
+from functools import partial
+import numpy as np
 import pandas as pd
-from tkinter import messagebox
 
-def process(self):
-    # Parameters
-    columns = ["ALPHA L", "ALPHA R", "BETA L", "BETA R", "DELTA L", "DELTA R", "THETA L", "THETA R"]
+import datasetCatalog
+import extractionManifest
+import profiler
+import rawCache
+import strokeReader
 
-    # Initialize GUI elements
-    self.log("Starting processing...")
-    output_dir = self.output_dir.get()
-    self.progress_bar['maximum'] = len(self.file_list)
-    self.progress_bar['value'] = 0
+# Parameters
+COLUMNS = ["ALPHA L", "ALPHA R", "BETA L", "BETA R", "DELTA L", "DELTA R", "THETA L", "THETA R"]
 
-    # Process each EEG datasets
-    for idx, file in enumerate(self.file_list):
-        self.progress_bar['value'] = idx + 1
-        self.root.update_idletasks()
-        self.log(f"Processing: {os.path.normpath(file)}")
 
-        # Extract 'P' value from filename
-        match = re.search(r'P\d+', file)
-        if not match:
-            self.log(f"Warning: No 'P' value found in {file}. Skipping.")
-            continue
-        p_value = match.group()
-
-        # Get file directory of the EEG dataset
-        file_dir = os.path.dirname(file).lower()
-
-        # Determine eye condition (open eyes, close eyes)
-        if "open eyes" in file_dir:
-            eyes_status = "open eyes"
-        elif "close eyes" in file_dir:
-            eyes_status = "close eyes"
-        else:
-            self.log(f"Warning: No 'open eyes' or 'close eyes' found in {file}. Skipping.")
-            continue
+def extraction_parameters(gap_policy='Drop'):
+    """Every setting that affects the extracted values, fingerprinted by the incremental manifest."""
+    return {'selection': 'Stroke', 'columns': COLUMNS, 'gap_policy': gap_policy.lower()}
+
+
+def read_stroke_columns(file, gap_policy='Drop'):
+    """Reads the band-power columns of a stroke export (.csv or .TXT), handling "===" gaps with gap_policy."""
+    return strokeReader.read_export(file, COLUMNS, gap_policy)
+
+
+def write_stroke_npy(file, npy_file, gap_policy='Drop'):
+    """Cache writer: stores the gap-handled band-power columns of a stroke export as floats."""
+    np.save(npy_file, read_stroke_columns(file, gap_policy).to_numpy(dtype=np.float64))
 
-        # Determine category (minor, moderate, severe)
-        category_match = re.search(r'(minor|moderate|severe)', file_dir)
-        if not category_match:
-            self.log(f"Warning: No category ('minor', 'moderate', or 'severe') found in {file}. Skipping.")
-            continue
-        category = category_match.group(1).lower()
 
-        # Read EEG data and remove second row
-        df = pd.read_csv(file, skiprows=[1])
+def process_file(file, output_dir, log=print, cache=None, stats=None, gap_policy='Drop', description=None):
+    """
+    Selects the band-power columns of one stroke export, saves them under category/eye status
+    and returns the written file paths (None when the file is skipped). Gaps are handled with
+    one of strokeReader.GAP_POLICIES. With a rawCache.RawCache the columns are read from their
+    memory-mapped binary copy. Every kept row is one window, added to stats['windows'] when a
+    Counter is given. description holds the file's subject, severity and eye state (e.g. from
+    the dataset catalog); by default they are derived from the path.
+    """
+    # 'P' value, eye condition and category of the export
+    description = description or datasetCatalog.describe_path(file)
+    p_value = description['subject']
+    if not p_value:
+        log(f"Warning: No 'P' value found in {file}. Skipping.")
+        return
 
-        # Select only columns of interest
-        df = df[columns]
+    eyes_status = description['eye']
+    if not eyes_status:
+        log(f"Warning: No 'open eyes' or 'close eyes' found in {file}. Skipping.")
+        return
 
-        # Remove rows containing "=" in any cell
-        df = df[~df.apply(lambda row: row.astype(str).str.contains("=").any(), axis=1)]
+    category = description['severity']
+    if not category:
+        log(f"Warning: No category ('minor', 'moderate', or 'severe') found in {file}. Skipping.")
+        return
 
-        # Create output directory
-        output_category_dir = os.path.join(output_dir, category, eyes_status)
-        os.makedirs(output_category_dir, exist_ok=True)
+    # Read the band-power columns with the gaps handled
+    with profiler.phase('read'):
+        if cache:
+            df = pd.DataFrame(np.asarray(cache.load(file, partial(write_stroke_npy, gap_policy=gap_policy),
+                                                    f"stroke:{gap_policy.lower()}")), columns=COLUMNS)
+        else:
+            df = read_stroke_columns(file, gap_policy)
+    if stats is not None:
+        stats['windows'] += len(df)
+
+    # Create output directory
+    output_category_dir = os.path.join(output_dir, category, eyes_status)
+    os.makedirs(output_category_dir, exist_ok=True)
 
-        # Define output filename and save
-        new_filename = f"{p_value}.csv"
+    # Define output filename and save
+    new_filename = f"{p_value}.csv"
 
-        output_file = os.path.join(output_category_dir, new_filename)
+    output_file = os.path.join(output_category_dir, new_filename)
+    with profiler.phase('write_csv'):
         df.to_csv(output_file, index=False)
 
-        self.log(f"Saved {new_filename} to {os.path.normpath(output_category_dir)}")
+    log(f"Saved {new_filename} to {os.path.normpath(output_category_dir)}")
+    return [output_file]
+
+
+@profiler.profiled('extract_stroke')
+def process(self):
+    # Initialize GUI elements
+    self.log("Starting processing...")
+    output_dir = self.output_dir.get()
+    cache = rawCache.get_cache(self)
+    gap_policy = self.gap_policy_var.get()
+    file_list, manifest = extractionManifest.select_files(self, extraction_parameters(gap_policy))
+    self.set_progress(0, len(file_list))
+
+    # Process each EEG datasets
+    stats = Counter(files=len(file_list), windows=0)
+    for idx, file in enumerate(file_list):
+        self.set_progress(idx + 1)
+        self.log(f"Processing: {os.path.normpath(file)}")
+        outputs = process_file(file, output_dir, self.log, cache, stats, gap_policy,
+                               datasetCatalog.describe(self, file))
+        if manifest and outputs:
+            manifest.record(file, outputs)
 
-    messagebox.showinfo("Processing Complete", "All files processed and saved successfully!")
\ No newline at end of file
+    self.show_info("Processing Complete", "All files processed and saved successfully!")
+    return stats
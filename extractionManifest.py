@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+
+import rawCache
+
+# Parameters
+MANIFEST_FILENAME = "extraction_manifest.json"
+
+
+def fingerprint(parameters):
+    """Hashes a JSON-serializable dict of extraction parameters."""
+    return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+
+
+class ExtractionManifest:
+    """
+    Records, per input file, its content hash, the fingerprint of the parameters it was
+    extracted with and the outputs it produced, so unchanged files can be skipped on reruns.
+    """
+
+    def __init__(self, output_dir, parameters):
+        self.manifest_file = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.fingerprint = fingerprint(parameters)
+        self.entries = {}
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file) as handle:
+                self.entries = json.load(handle)
+
+    def is_current(self, file):
+        """True when the file was already extracted from the same content with the same parameters."""
+        entry = self.entries.get(os.path.abspath(file))
+        if not entry or entry['fingerprint'] != self.fingerprint:
+            return False
+        if not all(os.path.exists(output) for output in entry['outputs']):
+            return False
+
+        # Only rehash the content when the file's size or modification time changed
+        stat = os.stat(file)
+        if (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return True
+        if entry['hash'] != rawCache.hash_file(file):
+            return False
+        entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        return True
+
+    def record(self, file, outputs):
+        """Stores the file's current state and outputs, then saves the manifest."""
+        stat = os.stat(file)
+        self.entries[os.path.abspath(file)] = {
+            'hash': rawCache.hash_file(file),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'fingerprint': self.fingerprint,
+            'outputs': [os.path.abspath(output) for output in outputs]
+        }
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_file) or '.', exist_ok=True)
+        temp_file = f"{self.manifest_file}.{os.getpid()}.tmp"
+        with open(temp_file, 'w') as handle:
+            json.dump(self.entries, handle, indent=1)
+        os.replace(temp_file, self.manifest_file)
+
+
+def select_files(self, parameters):
+    """
+    Returns the interface's files that still need extraction, and the manifest to record them in
+    (None when incremental extraction is off). Logs how many files were skipped.
+    """
+    if not self.incremental_var.get():
+        return self.file_list, None
+
+    manifest = ExtractionManifest(self.output_dir.get(), parameters)
+    pending_files = [file for file in self.file_list if not manifest.is_current(file)]
+    self.log(f"Incremental run: {len(self.file_list) - len(pending_files)} files unchanged and skipped, "
+             f"{len(pending_files)} files to recompute")
+    return pending_files, manifest
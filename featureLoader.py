@@ -0,0 +1,60 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import profiler
+
+try:
+    import pyarrow  # Optional: enables the Arrow CSV parser
+except ImportError:
+    pyarrow = None
+
+# Parameters
+DEFAULT_THREADS = min(8, (os.cpu_count() or 1) + 4)
+PARSERS = ['C', 'Arrow'] if pyarrow else ['C']
+
+
+def read_csv_rows(file, parser='C'):
+    """
+    Reads the rows of a feature CSV without its header row. 'C' is the default pandas parser;
+    'Arrow' parses with pyarrow (multithreaded, releases the GIL) and needs it installed.
+    """
+    if parser == 'Arrow':
+        if not pyarrow:
+            raise ValueError("The Arrow parser needs pyarrow; install it or use the C parser.")
+        return pd.read_csv(file, skiprows=1, header=None, engine='pyarrow')
+    if parser != 'C':
+        raise ValueError(f"Unknown parser {parser!r}; expected one of {', '.join(PARSERS)}.")
+    return pd.read_csv(file, skiprows=[0], header=None)
+
+
+def timed_read(read, file):
+    started = time.perf_counter()
+    with profiler.phase('read'):
+        df = read(file)
+    return df, time.perf_counter() - started
+
+
+def load_files(files, read, threads=DEFAULT_THREADS, on_file=None):
+    """
+    Reads the files with read(file) on a thread pool and returns their DataFrames in the order
+    of files. on_file(index, file, rows, seconds) is called in the calling thread, in order, as
+    each file becomes available (e.g. to log its timing and move the progress bar).
+    """
+    frames = []
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        for idx, (df, seconds) in enumerate(executor.map(lambda file: timed_read(read, file), files)):
+            frames.append(df)
+            if on_file:
+                on_file(idx, files[idx], len(df), seconds)
+    return frames
+
+
+def interface_reporter(self, offset=0):
+    """on_file callback moving an interface's progress bar and logging each file's rows and read time."""
+    def report(idx, file, rows, seconds):
+        self.set_progress(offset + idx + 1)
+        self.log(f"Loaded: {os.path.normpath(file)} ({rows} rows in {1000 * seconds:.1f} ms)")
+    return report
@@ -0,0 +1,171 @@
+import glob
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+import profiler
+
+# Parameters
+FEATURES_FILENAME = "psd_features.npz"
+DATASET_FILENAME = "psd_dataset.npz"
+
+
+def write_features(file_output_dir, psd_results, final_summary, columns, class_label, region_summaries=None):
+    """
+    Saves one recording's band PSD matrices (frames x channels), summary table and any custom
+    montage summaries as a compressed float32 .npz, next to or instead of its CSVs.
+    Returns the written path.
+    """
+    feature_file = os.path.join(file_output_dir, FEATURES_FILENAME)
+    np.savez_compressed(
+        feature_file,
+        summary=np.asarray(final_summary, dtype=np.float32).reshape(-1, len(columns)),
+        columns=np.array(columns, dtype=str),
+        classes=np.array([class_label or ''] * len(final_summary), dtype=str),
+        **{f'{band}_psd': matrix.T.astype(np.float32) for band, matrix in psd_results.items()},
+        **{f'{name}_summary': summary.astype(np.float32) for name, summary in (region_summaries or {}).items()}
+    )
+    return feature_file
+
+
+def read_table(file):
+    """
+    Reads the summary table of a psd_features.npz or psd_dataset.npz file as a DataFrame laid
+    out like psd_summary.csv (float64 feature columns followed by CLASS).
+    """
+    with np.load(file) as features:
+        df = pd.DataFrame(features['summary'].astype(np.float64), columns=features['columns'].tolist())
+        df['CLASS'] = pd.Series([label or np.nan for label in features['classes'].tolist()])
+    return df
+
+
+def read_band(file, band):
+    """Reads one band's (frames, channels) PSD matrix from a psd_features.npz file."""
+    with np.load(file) as features:
+        return features[f'{band}_psd']
+
+
+def build_dataset(output_dir):
+    """
+    Combines the summaries of every psd_features.npz directly under output_dir into one
+    psd_dataset.npz, with a subjects column naming the folder each row came from.
+    """
+    feature_files = sorted(glob.glob(os.path.join(output_dir, '*', FEATURES_FILENAME)))
+    if not feature_files:
+        return None
+
+    summaries, classes, subjects = [], [], []
+    for feature_file in feature_files:
+        with np.load(feature_file) as features:
+            summaries.append(features['summary'])
+            classes.append(features['classes'])
+            columns = features['columns']
+            subjects.append(np.full(len(features['classes']), os.path.basename(os.path.dirname(feature_file))))
+
+    dataset_file = os.path.join(output_dir, DATASET_FILENAME)
+    np.savez_compressed(dataset_file, summary=np.vstack(summaries), columns=columns,
+                        classes=np.concatenate(classes), subjects=np.concatenate(subjects))
+    return dataset_file
+
+
+# Columnar tables (normalized train/test data handed from normalization to the SVM)
+COLUMNAR_SUFFIX = ".cols"
+COLUMNAR_META = "table.json"
+TABLE_FORMATS = ['CSV', 'Columnar', 'CSV+Columnar']
+
+
+def columnar_dir(path):
+    """Returns the table directory of a columnar table path (the directory or its table.json), else None."""
+    path = os.path.normpath(path)
+    if os.path.basename(path) == COLUMNAR_META:
+        path = os.path.dirname(path)
+    return path if path.endswith(COLUMNAR_SUFFIX) else None
+
+
+class ColumnarWriter:
+    """
+    Writes a table as one raw float32 file per feature column plus int16 codes for a
+    categorical CLASS column, appending chunk by chunk. table.json (column names, row count,
+    class categories) is written by close(), so a table without it is incomplete.
+    """
+
+    def __init__(self, table_dir, columns):
+        if os.path.isdir(table_dir):
+            shutil.rmtree(table_dir)
+        os.makedirs(table_dir)
+        self.table_dir = table_dir
+        self.columns = list(columns)
+        self.features = [column for column in self.columns if column != 'CLASS']
+        self.categories = {}
+        self.rows = 0
+        self.handles = [open(os.path.join(table_dir, f"{idx}.f32"), 'wb') for idx in range(len(self.features))]
+        self.class_handle = open(os.path.join(table_dir, "CLASS.codes"), 'wb') if 'CLASS' in self.columns else None
+
+    def append(self, df):
+        """Appends rows laid out like columns (names or positions)."""
+        df = df.set_axis(self.columns, axis=1)
+        for handle, column in zip(self.handles, self.features):
+            handle.write(df[column].to_numpy(dtype=np.float32).tobytes())
+        if self.class_handle:
+            # Missing labels are stored as code -1
+            codes = [self.categories.setdefault(str(label), len(self.categories)) if pd.notna(label) else -1
+                     for label in df['CLASS']]
+            self.class_handle.write(np.asarray(codes, dtype=np.int16).tobytes())
+        self.rows += len(df)
+
+    def close(self):
+        for handle in self.handles + ([self.class_handle] if self.class_handle else []):
+            handle.close()
+        with open(os.path.join(self.table_dir, COLUMNAR_META), 'w') as handle:
+            json.dump({'columns': self.columns, 'features': self.features, 'rows': self.rows,
+                       'categories': list(self.categories) if self.class_handle else None}, handle)
+        return self.table_dir
+
+
+def write_columnar(table_dir, df, columns):
+    """Writes a whole DataFrame as a columnar table and returns its directory."""
+    writer = ColumnarWriter(table_dir, columns)
+    writer.append(df)
+    return writer.close()
+
+
+def read_columnar(path):
+    """
+    Reads a columnar table as a DataFrame of float32 feature columns memory-mapped from disk
+    (nothing is parsed or copied up front) and, when present, a categorical CLASS column.
+    """
+    table_dir = columnar_dir(path) or path
+    with open(os.path.join(table_dir, COLUMNAR_META)) as handle:
+        meta = json.load(handle)
+    rows = meta['rows']
+    data = {}
+    for column in meta['columns']:
+        if column == 'CLASS':
+            codes = np.fromfile(os.path.join(table_dir, "CLASS.codes"), dtype=np.int16, count=rows)
+            data[column] = pd.Categorical.from_codes(codes, categories=meta['categories'])
+        elif rows:
+            column_file = os.path.join(table_dir, f"{meta['features'].index(column)}.f32")
+            data[column] = np.memmap(column_file, dtype=np.float32, mode='r', shape=(rows,))
+        else:
+            data[column] = np.empty(0, dtype=np.float32)
+    return pd.DataFrame(data, copy=False)
+
+
+def write_table(csv_file, df, columns, table_format='CSV'):
+    """
+    Writes a normalized table as csv_file, as a columnar table next to it (same name with
+    COLUMNAR_SUFFIX) or both, depending on table_format. Returns the written paths.
+    """
+    if table_format not in TABLE_FORMATS:
+        raise ValueError(f"Unknown table format {table_format!r}; expected one of {', '.join(TABLE_FORMATS)}.")
+    outputs = []
+    if table_format != 'Columnar':
+        with profiler.phase('write_csv'):
+            df.to_csv(csv_file, index=False, header=columns)
+        outputs.append(csv_file)
+    if 'Columnar' in table_format:
+        with profiler.phase('write_columnar'):
+            outputs.append(write_columnar(os.path.splitext(csv_file)[0] + COLUMNAR_SUFFIX, df, columns))
+    return outputs
@@ -1,11 +1,27 @@
 import os
+from collections import Counter
+from functools import partial
 import joblib
 import pandas as pd
-from tkinter import messagebox
 
 from PIL.ImageOps import scale
-from sklearn.preprocessing import MinMaxScaler,StandardScaler
 
+import featureLoader
+import featureStore
+import profiler
+import scalerRegistry
+import streamingScalers
+
+
+def read_features(file, parser='C'):
+    """Reads the rows of a psd_summary.csv, psd_features.npz or psd_dataset.npz file without its header."""
+    if file.endswith('.npz'):
+        df = featureStore.read_table(file)
+        df.columns = range(df.shape[1])
+        return df
+    return featureLoader.read_csv_rows(file, parser)
+
+@profiler.profiled('normalize_normal')
 def process(self):
     # Parameters
     columns = ["ALPHA L", "ALPHA R", "BETA L", "BETA R", "DELTA L", "DELTA R", "THETA L", "THETA R", "CLASS"]
@@ -13,33 +29,27 @@ def process(self):
     # Initialize GUI elements
     self.log("Starting processing...")
     output_dir = self.output_dir.get()
-    self.progress_bar['maximum'] = len(self.file_list)
-    self.progress_bar['value'] = 0
+    self.set_progress(0, len(self.file_list))
 
-    stacked_df = pd.DataFrame()
-    scaler_value = self.scaler_var.get()
+    # Initialize the scaler (Robust and Quantile are fitted from quantile sketches)
+    scaler = streamingScalers.new_scaler(self.scaler_var.get(), float(self.sketch_error_var.get()))
+    read = partial(read_features, parser=self.parser_var.get())
+    if self.streaming_var.get():
+        return process_streaming(self, columns, scaler, read)
 
-    # Process each EEG datasets
-    for idx, file in enumerate(self.file_list):
-        self.progress_bar['value'] = idx + 1
-        self.root.update_idletasks()
-        self.log(f"Processing: {os.path.normpath(file)}")
-
-        # Read EEG data and stack them
-        df = pd.read_csv(file, skiprows=[0], header=None)
-        stacked_df = pd.concat([stacked_df, df], ignore_index=True)
-
-    # Initialize the scaler
-    if scaler_value == "Standard":
-        scaler = StandardScaler()
-    elif scaler_value == "MinMax":
-        scaler = MinMaxScaler()
+    # Read the EEG datasets concurrently (in file order) and stack them
+    frames = featureLoader.load_files(self.file_list, read, int(self.threads_var.get()),
+                                      featureLoader.interface_reporter(self))
+    stacked_df = pd.concat(frames, ignore_index=True)
 
     # Select only numeric columns for normalization
     numeric_cols = stacked_df.select_dtypes(include=['float64', 'int64']).columns
 
-    # Fit the scaler on training data
-    scaler.fit(stacked_df[numeric_cols])
+    # Fit the scaler on training data (or reuse a matching fitted one)
+    def fit():
+        with profiler.phase('fit'):
+            return scaler.fit(stacked_df[numeric_cols])
+    scaler = scalerRegistry.fitted_scaler(self, 'train', scaler, self.file_list, fit)
 
     # Save the scaler for later use
     scaler_filename = f"train_scaler.pkl"
@@ -48,7 +58,8 @@ def process(self):
     print(f"Saved file: {os.path.normpath(scaler_file)}")
 
     # Normalize only numeric columns
-    df_normalized = pd.DataFrame(scaler.transform(stacked_df[numeric_cols]), columns=numeric_cols)
+    with profiler.phase('transform'):
+        df_normalized = pd.DataFrame(scaler.transform(stacked_df[numeric_cols]), columns=numeric_cols)
 
     # Concatenate normalized numeric columns with non-numeric columns
     df_normalized = pd.concat([df_normalized, stacked_df.drop(columns=numeric_cols)], axis=1)
@@ -56,11 +67,46 @@ def process(self):
     # Reorder columns to match the original DataFrame
     df_normalized = df_normalized[stacked_df.columns]
 
-    # Define output filename and save
+    # Define output filename and save (as CSV and/or a columnar table for the SVM stage)
     new_filename = f"train_data.csv"
     output_file = os.path.join(output_dir, new_filename)
-    df_normalized.to_csv(output_file, index=False, header=columns)
-    self.log(f"Saved file: {os.path.normpath(output_file)}")
+    for output in featureStore.write_table(output_file, df_normalized, columns, self.output_format_var.get()):
+        self.log(f"Saved file: {os.path.normpath(output)}")
+
 
+    self.show_info("Processing Complete", "All files processed and saved successfully!")
+    return Counter(files=len(self.file_list), rows=len(df_normalized))
 
-    messagebox.showinfo("Processing Complete", "All files processed and saved successfully!")
\ No newline at end of file
+
+def process_streaming(self, columns, scaler, read=read_features):
+    """
+    Fits the scaler with partial_fit over the files (on workers_var processes for the
+    sketch-based scalers) and then normalizes them in a second pass, appending to
+    train_data.csv, so only one file is in memory at a time.
+    """
+    output_dir = self.output_dir.get()
+    files = self.file_list
+    self.set_progress(0, 2 * len(files))
+
+    def fitted(idx):
+        self.log(f"Fitted: {os.path.normpath(files[idx])}")
+        self.set_progress(idx + 1)
+    scaler = scalerRegistry.fitted_scaler(
+        self, 'train', scaler, files,
+        lambda: streamingScalers.fit_files_parallel(files, read, scaler, int(self.workers_var.get()), fitted)[0])
+
+    # Save the scaler for later use
+    scaler_file = os.path.join(output_dir, "train_scaler.pkl")
+    joblib.dump(scaler, scaler_file)
+    self.log(f"Saved file: {os.path.normpath(scaler_file)}")
+
+    # Normalize and append each file to the output
+    output_file = os.path.join(output_dir, "train_data.csv")
+    rows, outputs = streamingScalers.transform_files(files, read, scaler, output_file, columns,
+                                                     lambda idx: self.set_progress(len(files) + idx + 1),
+                                                     self.output_format_var.get())
+    for output in outputs:
+        self.log(f"Saved file: {os.path.normpath(output)}")
+
+    self.show_info("Processing Complete", "All files processed and saved successfully!")
+    return Counter(files=len(files), rows=rows)
@@ -1,11 +1,25 @@
 import os
-import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import joblib
 import pandas as pd
-from tkinter import messagebox
-from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from sklearn.base import clone
 
+import datasetCatalog
+import featureLoader
+import featureStore
+import profiler
+import scalerRegistry
+import streamingScalers
 
+
+def read_features(file, parser='C'):
+    """Reads the rows of a stroke feature file without its header."""
+    return featureLoader.read_csv_rows(file, parser)
+
+
+@profiler.profiled('normalize_stroke')
 def process(self):
     # Parameters
     columns = ["ALPHA L", "ALPHA R", "BETA L", "BETA R", "DELTA L", "DELTA R", "THETA L", "THETA R"]
@@ -13,74 +27,122 @@ def process(self):
     # Initialize GUI elements
     self.log("Starting processing...")
     output_dir = self.output_dir.get()
-    self.progress_bar['maximum'] = len(self.file_list)
-    self.progress_bar['value'] = 0
 
     category = ""
     eyes_status = ""
-    stacked_df = pd.DataFrame()
+    groups = {}
 
     # Process each EEG datasets
-    for idx, file in enumerate(self.file_list):
-        self.progress_bar['value'] = idx + 1
-        self.root.update_idletasks()
+    for file in self.file_list:
         self.log(f"Processing: {os.path.normpath(file)}")
 
-        file_dir = os.path.dirname(file).lower()
-
-        # Determine eye condition (open eyes, close eyes)
-        if "open eyes" in file_dir:
-            eyes_status = "open eyes"
-        elif "close eyes" in file_dir:
-            eyes_status = "close eyes"
-        else:
+        # Determine eye condition (open eyes, close eyes) and category (minor, moderate, severe)
+        description = datasetCatalog.describe(self, file)
+        if not description['eye']:
             self.log(f"Warning: No 'open eyes' or 'close eyes' found in {file}. Skipping.")
             continue
+        eyes_status = description['eye']
 
-        # Determine category (minor, moderate, severe)
-        category_match = re.search(r'(minor|moderate|severe)', file_dir)
-        if not category_match:
+        if not description['severity']:
             self.log(f"Warning: No category ('minor', 'moderate', or 'severe') found in {file}. Skipping.")
             continue
-        category = category_match.group(1).lower()
+        category = description['severity']
+
+        groups.setdefault(group_name(category, eyes_status), []).append(file)
 
-        # Read EEG data and stack them
-        df = pd.read_csv(file, skiprows=[0], header=None)
-        stacked_df = pd.concat([stacked_df, df], ignore_index=True)
+    valid_files = [file for files in groups.values() for file in files]
+    self.set_progress(0, len(valid_files))  # Skipped files never report progress
 
+    # Without grouping every file goes to one scaler named after the last file's cohort
+    if not self.grouped_var.get():
+        groups = {group_name(category, eyes_status): valid_files}
 
+    scaler = streamingScalers.new_scaler(self.scaler_var.get(), float(self.sketch_error_var.get()))
+    read = partial(read_features, parser=self.parser_var.get())
+    if self.streaming_var.get():
+        rows = process_streaming(self, columns, groups, scaler, read)
+    else:
+        # Read the EEG datasets concurrently (in file order), once, and stack them per group
+        frames = featureLoader.load_files(valid_files, read, int(self.threads_var.get()),
+                                          featureLoader.interface_reporter(self))
+        frames = dict(zip(valid_files, frames))
+        stacked = {name: pd.concat([frames[file] for file in files], ignore_index=True)
+                   for name, files in groups.items()}
 
+        # Fit, normalize and write the groups in parallel
+        with ThreadPoolExecutor(max_workers=max(1, int(self.threads_var.get()))) as executor:
+            rows = sum(executor.map(lambda name: normalize_group(self, stacked[name], name, groups[name], scaler,
+                                                                 columns, output_dir), stacked))
 
+    self.show_info("Processing Complete", "All files processed and saved successfully!")
+    return Counter(files=len(valid_files), groups=len(groups), rows=rows)
 
-    # Load the saved scaler
-    # scaler_filename = f"scaler.pkl"
-    # scaler_file = os.path.join(output_dir, scaler_filename)
-    # scaler = joblib.load(scaler_file)
-    # self.log(f"Loaded file: {os.path.normpath(scaler_file)}")
 
-    # # Initialize the scaler
-    scaler = StandardScaler()
+def group_name(category, eyes_status):
+    """Output file prefix of a cohort, e.g. minor_open_eyes."""
+    return f"{category}_{eyes_status}".replace(" ", "_")
 
+
+def normalize_group(self, stacked_df, name, files, scaler, columns, output_dir):
+    """
+    Fits a copy of scaler on one cohort's rows (or reuses a loaded or registered one), saves it
+    and writes the normalized test data; returns the rows.
+    """
     # Select only numeric columns for normalization
     numeric_cols = stacked_df.select_dtypes(include=['float64', 'int64']).columns
 
     # Fit the scaler on training data
-    scaler.fit(stacked_df[numeric_cols])
+    def fit():
+        with profiler.phase('fit'):
+            return clone(scaler).fit(stacked_df[numeric_cols])
+    scaler = scalerRegistry.fitted_scaler(self, name, scaler, files, fit)
 
     # Save the scaler for later use
-    scaler_filename = f"{category}_{eyes_status}_scaler.pkl".replace(" ", "_")
-    scaler_file = os.path.join(output_dir, scaler_filename)
+    scaler_file = os.path.join(output_dir, f"{name}_scaler.pkl")
     joblib.dump(scaler, scaler_file)
-    print(f"Saved file: {os.path.normpath(scaler_file)}")
+    self.log(f"Saved file: {os.path.normpath(scaler_file)}")
 
     # Normalize only numeric columns
-    df_normalized = pd.DataFrame(scaler.transform(stacked_df[numeric_cols]), columns=numeric_cols)
-    # df_normalized = pd.DataFrame(scaler.transform(stacked_df), columns=stacked_df.columns)
-
-    # Define output filename and save
-    new_filename = f"{category}_{eyes_status}_test_data.csv".replace(" ", "_")
-    output_file = os.path.join(output_dir, new_filename)
-    df_normalized.to_csv(output_file, index=False, header=columns)
-    self.log(f"Saved file: {os.path.normpath(output_file)}")
-
-    messagebox.showinfo("Processing Complete", "All files processed and saved successfully!")
\ No newline at end of file
+    with profiler.phase('transform'):
+        df_normalized = pd.DataFrame(scaler.transform(stacked_df[numeric_cols]), columns=numeric_cols)
+
+    # Define output filename and save (as CSV and/or a columnar table for the SVM stage)
+    output_file = os.path.join(output_dir, f"{name}_test_data.csv")
+    for output in featureStore.write_table(output_file, df_normalized, columns, self.output_format_var.get()):
+        self.log(f"Saved file: {os.path.normpath(output)}")
+    return len(df_normalized)
+
+
+def process_streaming(self, columns, groups, scaler, read=read_features):
+    """
+    Fits a copy of scaler per group with partial_fit over its files (on workers_var processes
+    for the sketch-based scalers) and then normalizes them in a second pass, appending to the
+    group's test data file, so only one file is in memory at a time. Returns the rows written.
+    """
+    output_dir = self.output_dir.get()
+    total = sum(len(files) for files in groups.values())
+    self.set_progress(0, 2 * total)
+    done = rows = 0
+
+    for name, files in groups.items():
+        fitted = scalerRegistry.fitted_scaler(
+            self, name, scaler, files,
+            lambda: streamingScalers.fit_files_parallel(files, read, clone(scaler), int(self.workers_var.get()),
+                                                        lambda idx: self.set_progress(done + idx + 1))[0])
+        done += len(files)
+
+        # Save the scaler for later use
+        scaler_file = os.path.join(output_dir, f"{name}_scaler.pkl")
+        joblib.dump(fitted, scaler_file)
+        self.log(f"Saved file: {os.path.normpath(scaler_file)}")
+
+        # Normalize and append each file to the output
+        output_file = os.path.join(output_dir, f"{name}_test_data.csv")
+        group_rows, outputs = streamingScalers.transform_files(files, read, fitted, output_file, columns,
+                                                               lambda idx: self.set_progress(done + idx + 1),
+                                                               self.output_format_var.get())
+        rows += group_rows
+        done += len(files)
+        for output in outputs:
+            self.log(f"Saved file: {os.path.normpath(output)}")
+    return rows
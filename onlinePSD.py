@@ -0,0 +1,149 @@
+import argparse
+import time
+import numpy as np
+from scipy.fft import rfft
+from scipy.signal import lfilter, lfilter_zi
+
+import extractNormalPSD
+import streamingReader
+from extractNormalPSD import FFT_BINS, FILTERS, FREQUENCY_BANDS, FS, WINDOW_SIZE, WINDOW_WIDTH
+
+
+class HopResult:
+    """Features emitted for one hop: band powers per channel, montage summaries and latency."""
+
+    def __init__(self, sample, psd, summary, regions, latency):
+        self.sample = sample  # Samples received when the window closed
+        self.psd = psd  # {band: (channels,)}
+        self.summary = summary  # (8,) hemisphere summary, laid out like a psd_summary.csv row
+        self.regions = regions  # {montage: (bands * regions,)} for custom montages
+        self.latency = latency  # Seconds from receiving the block to emitting this hop
+
+
+class OnlinePSDExtractor:
+    """
+    Computes band-power features while a recording is in progress. Incoming sample blocks
+    are band-pass filtered causally (lfilter with carried state, so no look-ahead is needed)
+    into one ring buffer per band and channel, and every WINDOW_WIDTH samples the last
+    WINDOW_SIZE filtered samples give the same band/hemisphere features as the offline
+    extraction. Values differ from the offline engines, which filter every window forwards
+    and backwards (filtfilt), but hops line up with the offline frames.
+    """
+
+    def __init__(self, num_channels=62, montages=None, window_size=WINDOW_SIZE, window_width=WINDOW_WIDTH):
+        self.num_channels = num_channels
+        self.window_size = window_size
+        self.window_width = window_width
+        self.compiled_montages = extractNormalPSD.compile_summary_montages(num_channels, montages)
+        self.reset()
+
+    def reset(self):
+        """Clears the ring buffers and filter states, as at the start of a recording."""
+        self.ring = np.zeros((len(FREQUENCY_BANDS), self.num_channels, self.window_size))
+        self.position = 0  # Next write index in the ring
+        self.samples_seen = 0
+        self.filter_state = {band: np.zeros((self.num_channels, len(lfilter_zi(b, a))))
+                             for band, (b, a) in FILTERS.items()}
+
+    def push(self, block):
+        """
+        Adds a (channels, samples) block and returns a HopResult for every hop completed by it.
+        Blocks may be any length; a block spanning several hops emits all of them.
+        """
+        received = time.perf_counter()
+        block = np.asarray(block, dtype=np.float64).reshape(self.num_channels, -1)
+        results = []
+
+        start = 0
+        while start < block.shape[1]:
+            # Feed samples up to the next hop boundary so every hop sees exactly its window
+            end = min(block.shape[1], start + self.samples_to_next_hop())
+            self.write(block[:, start:end])
+            start = end
+            if self.hop_ready():
+                results.append(self.emit(received))
+
+        return results
+
+    def samples_to_next_hop(self):
+        if self.samples_seen < self.window_size:
+            return self.window_size - self.samples_seen
+        return self.window_width - (self.samples_seen - self.window_size) % self.window_width
+
+    def hop_ready(self):
+        return self.samples_seen >= self.window_size and \
+            (self.samples_seen - self.window_size) % self.window_width == 0
+
+    def write(self, piece):
+        """Filters a piece of at most one hop and appends it to the ring buffers."""
+        count = piece.shape[1]
+        indices = (self.position + np.arange(count)) % self.window_size
+        for band_index, (band, (b, a)) in enumerate(FILTERS.items()):
+            filtered, self.filter_state[band] = lfilter(b, a, piece, axis=-1, zi=self.filter_state[band])
+            self.ring[band_index][:, indices] = filtered
+        self.position = (self.position + count) % self.window_size
+        self.samples_seen += count
+
+    def emit(self, received):
+        """Computes the features of the current window, oldest sample first."""
+        window = np.roll(self.ring, -self.position, axis=-1)
+        fft_result = np.abs(rfft(window, FS, axis=-1)[..., :FFT_BINS])
+        power = np.max(np.square(fft_result), axis=-1)  # Shape: (bands, channels)
+        psd = {band: power[band_index] for band_index, band in enumerate(FREQUENCY_BANDS)}
+
+        summaries = extractNormalPSD.summarize_regions({band: values[:, None] for band, values in psd.items()},
+                                                       self.compiled_montages)
+        summary = summaries.pop('hemisphere')[0]
+        regions = {name: values[0] for name, values in summaries.items()}
+        return HopResult(self.samples_seen, psd, summary, regions, time.perf_counter() - received)
+
+
+def replay_csv(file, speed=1.0, block_samples=WINDOW_WIDTH, montages=None, callback=None):
+    """
+    Replays a headerless channels x samples EEG CSV through an OnlinePSDExtractor in blocks
+    of block_samples, paced at speed times real time (0 replays as fast as possible).
+    Calls callback(result) for every hop and returns all HopResults.
+    """
+    extractor = None
+    results = []
+    started = time.perf_counter()
+    samples_sent = 0
+
+    for block in streamingReader.iter_sample_chunks(file, block_samples):
+        if extractor is None:
+            extractor = OnlinePSDExtractor(block.shape[0], montages)
+
+        # Wait until the block would have been recorded
+        if speed:
+            delay = started + samples_sent / (FS * speed) - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        for result in extractor.push(block):
+            results.append(result)
+            if callback:
+                callback(result)
+        samples_sent += block.shape[1]
+
+    return results
+
+
+def latency_summary(results):
+    """Mean, 95th percentile and maximum per-hop latency in milliseconds."""
+    latencies = np.array([result.latency for result in results]) * 1000
+    if not len(latencies):
+        return {'hops': 0, 'mean_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+    return {'hops': len(latencies), 'mean_ms': float(latencies.mean()),
+            'p95_ms': float(np.percentile(latencies, 95)), 'max_ms': float(latencies.max())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay an EEG CSV through the online feature extractor.")
+    parser.add_argument("file", help="Headerless channels x samples EEG CSV")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed (1 = real time, 0 = unpaced)")
+    parser.add_argument("--block", type=int, default=WINDOW_WIDTH, help="Samples per pushed block")
+    args = parser.parse_args()
+
+    summary = latency_summary(replay_csv(args.file, args.speed, args.block))
+    print(f"{summary['hops']} hops, latency mean {summary['mean_ms']:.3f} ms, "
+          f"p95 {summary['p95_ms']:.3f} ms, max {summary['max_ms']:.3f} ms")
@@ -0,0 +1,139 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Shared no-op context returned by phase() while profiling is off
+NO_PHASE = nullcontext()
+
+
+class Profiler:
+    """
+    Collects named phase timings and counters for one run. Phases nest, may be recorded from
+    several threads, and are kept as individual events so they can be exported as a Chrome
+    trace (chrome://tracing or https://ui.perfetto.dev).
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events = []  # (name, start, duration, pid, tid)
+        self.counters = {}
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, events):
+        """Adds events recorded by another process (perf_counter is shared system-wide)."""
+        self.events.extend(events)
+
+    def totals(self):
+        """{phase: (calls, seconds)} ordered by total time, longest first."""
+        totals = {}
+        for name, _, duration, _, _ in self.events:
+            calls, seconds = totals.get(name, (0, 0.0))
+            totals[name] = (calls + 1, seconds + duration)
+        return dict(sorted(totals.items(), key=lambda item: -item[1][1]))
+
+    def summary_lines(self):
+        totals = self.totals()
+        wall = max((start + duration for _, start, duration, _, _ in self.events), default=self.origin) - self.origin
+        lines = [f"Profile ({wall:.3f} s wall):"]
+        for name, (calls, seconds) in totals.items():
+            share = 100 * seconds / wall if wall else 0.0
+            lines.append(f"  {name:<20} {seconds:9.3f} s {calls:7d} calls {1000 * seconds / calls:9.3f} ms/call "
+                         f"{share:6.1f}%")
+        if self.counters:
+            lines.append("  " + ", ".join(f"{name}: {value}" for name, value in self.counters.items()))
+        return lines
+
+    def write_trace(self, file):
+        """Writes the events and counters as a Chrome trace JSON file and returns its path."""
+        trace_events = [{'name': name, 'ph': 'X', 'ts': (start - self.origin) * 1e6, 'dur': duration * 1e6,
+                         'pid': pid, 'tid': tid} for name, start, duration, pid, tid in self.events]
+        end = max((event['ts'] + event['dur'] for event in trace_events), default=0.0)
+        trace_events += [{'name': name, 'ph': 'C', 'ts': end, 'pid': os.getpid(), 'args': {name: value}}
+                         for name, value in self.counters.items()]
+        with open(file, 'w') as handle:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, handle)
+        return file
+
+
+class Phase:
+    """Times one with-block into its Profiler."""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.events.append((self.name, self.start, time.perf_counter() - self.start, os.getpid(),
+                                     threading.get_ident()))
+        return False
+
+
+# Profiler of the run in progress in this process (None while profiling is off)
+ACTIVE = None
+
+
+def phase(name):
+    """Context manager timing a named phase of the active run; a shared no-op when profiling is off."""
+    return ACTIVE.phase(name) if ACTIVE else NO_PHASE
+
+
+def count(name, amount=1):
+    if ACTIVE:
+        ACTIVE.count(name, amount)
+
+
+def start():
+    """Starts profiling in this process and returns the new active Profiler."""
+    global ACTIVE
+    ACTIVE = Profiler()
+    return ACTIVE
+
+
+def stop():
+    """Stops profiling in this process and returns the Profiler that was active."""
+    global ACTIVE
+    active, ACTIVE = ACTIVE, None
+    return active
+
+
+def profiled(stage):
+    """
+    Decorates a stage function process(self). When the interface's profile_var is set, the run
+    is profiled as one phase named stage, the counts it returns become counters, the summary is
+    written to the interface log and the Chrome trace is saved as profile_<stage>_<time>.json in
+    the output directory.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(self):
+            if not self.profile_var.get():
+                return function(self)
+
+            active = start()
+            try:
+                with active.phase(stage):
+                    result = function(self)
+            finally:
+                stop()
+
+            for name, value in (result or {}).items():
+                active.count(name, value)
+            for line in active.summary_lines():
+                self.log(line)
+            trace_file = os.path.join(self.output_dir.get(), f"profile_{stage}_{time.strftime('%Y%m%d-%H%M%S')}.json")
+            self.log(f"Saved profile trace: {os.path.normpath(active.write_trace(trace_file))}")
+            return result
+        return wrapper
+    return decorator
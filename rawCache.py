@@ -0,0 +1,148 @@
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+
+import streamingReader
+
+# Parameters
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".eeg_raw_cache")
+DEFAULT_MAX_MB = 4096
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def hash_file(file):
+    """Returns the SHA-256 hex digest of a file's content, read block by block."""
+    digest = hashlib.sha256()
+    with open(file, 'rb') as handle:
+        while block := handle.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def convert_eeg_csv(file, npy_file):
+    """Converts a headerless channels x samples CSV to .npy chunk by chunk, with bounded memory."""
+    offsets = streamingReader.find_row_offsets(file)
+    num_samples = streamingReader.count_row_samples(file, offsets[0]) if offsets else 0
+    array = np.lib.format.open_memmap(npy_file, mode='w+', dtype=np.float64, shape=(len(offsets), num_samples))
+
+    position = 0
+    for chunk in streamingReader.iter_sample_chunks(file):
+        array[:, position:position + chunk.shape[1]] = chunk
+        position += chunk.shape[1]
+    array.flush()
+    del array
+
+    if position != num_samples:
+        raise ValueError(f"Channel rows of {file} have different numbers of samples.")
+
+
+class RawCache:
+    """
+    Memory-mapped .npy cache of parsed raw inputs. Entries are named by a hash of their
+    content, a small stamp per (path, size, mtime) saves rehashing unchanged files, and the
+    least recently accessed entries are evicted once the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB << 20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def content_key(self, file, namespace):
+        """Returns the cache key of a file, hashing its content only when its stamp has changed."""
+        stat = os.stat(file)
+        stamp = f"{namespace}|{os.path.abspath(file)}|{stat.st_size}|{stat.st_mtime_ns}"
+        stamp_file = os.path.join(self.cache_dir, hashlib.sha1(stamp.encode()).hexdigest() + '.json')
+        if os.path.exists(stamp_file):
+            with open(stamp_file) as handle:
+                return json.load(handle)['key']
+
+        key = hashlib.sha256(f"{namespace}|{hash_file(file)}".encode()).hexdigest()
+        with open(stamp_file, 'w') as handle:
+            json.dump({'file': os.path.abspath(file), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                       'key': key}, handle)
+        return key
+
+    def load(self, file, writer, namespace):
+        """
+        Returns the cached array of a file as a read-only memory map. On a miss, writer(file, npy_file)
+        converts the file into npy_file first.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = os.path.join(self.cache_dir, self.content_key(file, namespace) + '.npy')
+
+        if os.path.exists(entry):
+            # Mark the entry as recently used
+            os.utime(entry)
+        else:
+            temp_entry = f"{entry[:-len('.npy')]}.{os.getpid()}.tmp.npy"
+            writer(file, temp_entry)
+            os.replace(temp_entry, entry)
+            self.evict(keep=entry)
+
+        return np.load(entry, mmap_mode='r')
+
+    def load_eeg(self, file):
+        """Returns a headerless channels x samples EEG CSV as a (channels, samples) memory map."""
+        return self.load(file, convert_eeg_csv, 'eeg')
+
+    def entries(self):
+        """Lists the cached arrays as (path, size, last access) tuples, least recently used first."""
+        entries = []
+        for entry in glob.glob(os.path.join(self.cache_dir, '*.npy')):
+            if '.tmp.' not in entry:
+                stat = os.stat(entry)
+                entries.append((entry, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda item: item[2])
+
+    def evict(self, keep=None):
+        """
+        Deletes least recently used entries until the cache fits within max_bytes, then the
+        stamps of the deleted entries and of files that changed or are gone.
+        """
+        entries = self.entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        removed_keys = set()
+        for entry, size, _ in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            try:
+                os.remove(entry)
+            except OSError:
+                continue
+            total_bytes -= size
+            removed_keys.add(os.path.basename(entry)[:-len('.npy')])
+        self.prune_stamps(removed_keys)
+
+    def prune_stamps(self, removed_keys=()):
+        """
+        Deletes the stamps whose key is in removed_keys or whose file no longer has the stamped
+        size and mtime (or no longer exists). Returns the number deleted.
+        """
+        removed = 0
+        for stamp_file in glob.glob(os.path.join(self.cache_dir, '*.json')):
+            try:
+                with open(stamp_file) as handle:
+                    stamp = json.load(handle)
+                stat = os.stat(stamp['file'])
+                stale = stamp['key'] in removed_keys or \
+                    (stat.st_size, stat.st_mtime_ns) != (stamp['size'], stamp['mtime_ns'])
+            except (OSError, ValueError, KeyError):
+                stale = True
+            if stale:
+                try:
+                    os.remove(stamp_file)
+                except OSError:
+                    continue
+                removed += 1
+        return removed
+
+
+def get_cache(self):
+    """Returns the RawCache configured in the interface, or None when caching is disabled."""
+    if not self.cache_var.get():
+        return None
+    return RawCache(self.cache_dir.get() or DEFAULT_CACHE_DIR, int(self.cache_size_var.get()) << 20)
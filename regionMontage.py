@@ -0,0 +1,85 @@
+import json
+import os
+import numpy as np
+
+# Parameters
+RESERVED_NAMES = ('psd', 'hemisphere')  # psd_summary.csv and the built-in montage behind it
+
+
+def compile_montages(montages, num_channels):
+    """
+    Compiles {montage: {region: channels}} into one (regions, channels) aggregation matrix, plus
+    the row slice and region names of every montage. Channels are 0-based indices averaged with
+    equal weight, or {index: weight} dicts whose weights are normalized to sum to one.
+    Raises ValueError for channels outside 0..num_channels - 1 and weights summing to zero.
+    """
+    rows = []
+    layout = {}
+    for name, regions in montages.items():
+        start = len(rows)
+        for channels in regions.values():
+            if isinstance(channels, dict):
+                indices = np.array(list(channels.keys()), dtype=int)
+                weights = np.array(list(channels.values()), dtype=np.float64)
+            else:
+                indices = np.asarray(channels, dtype=int)
+                weights = np.ones(len(indices))
+
+            if len(indices) and (indices.min() < 0 or indices.max() >= num_channels):
+                raise ValueError(f"Montage {name!r} uses channels outside 0..{num_channels - 1}.")
+            if weights.sum() == 0:
+                raise ValueError(f"Montage {name!r} has a region whose channel weights sum to zero.")
+
+            row = np.zeros(num_channels)
+            np.add.at(row, indices, weights / weights.sum())
+            rows.append(row)
+        layout[name] = (slice(start, len(rows)), list(regions))
+
+    return np.array(rows).reshape(-1, num_channels), layout
+
+
+def apply_montages(psd_results, bands, matrix, layout):
+    """
+    Aggregates all bands and frames for every compiled montage in a single matrix multiply.
+    Returns {montage: (frames, bands * regions)} with each band's regions next to each other.
+    """
+    stacked = np.stack([psd_results[band] for band in bands])  # Shape: (bands, channels, frames)
+    regions = np.matmul(matrix, stacked)  # Shape: (bands, regions, frames)
+    num_frames = stacked.shape[2]
+    return {name: regions[:, rows, :].transpose(2, 0, 1).reshape(num_frames, -1) for name, (rows, _) in layout.items()}
+
+
+def region_columns(bands, regions):
+    """Column names of a montage summary, e.g. 'ALPHA Frontal'."""
+    return [f"{band.upper()} {region}" for band in bands for region in regions]
+
+
+def load_montages(file):
+    """
+    Reads custom montages from a JSON file of {montage: {region: channels}}, where channels
+    are 1-based channel numbers or {channel number: weight} objects. Raises ValueError for
+    reserved montage names, channel numbers below 1 and regions without weight.
+    """
+    with open(file) as handle:
+        montages = json.load(handle)
+
+    for name, regions in montages.items():
+        if name.lower() in RESERVED_NAMES or not name or os.sep in name or '/' in name:
+            raise ValueError(f"Invalid montage name {name!r} in {file}; it must be a plain file name other than "
+                             f"{' or '.join(RESERVED_NAMES)}.")
+        for region, channels in regions.items():
+            numbers = [int(channel) for channel in channels]
+            if any(number < 1 for number in numbers):
+                raise ValueError(f"Montage {name!r} region {region!r} in {file}: channel numbers start at 1.")
+            weights = list(channels.values()) if isinstance(channels, dict) else [1] * len(numbers)
+            if sum(weights) == 0:
+                raise ValueError(f"Montage {name!r} region {region!r} in {file} has no channels or zero total weight.")
+
+    return {
+        name: {
+            region: {int(channel) - 1: weight for channel, weight in channels.items()}
+            if isinstance(channels, dict) else [int(channel) - 1 for channel in channels]
+            for region, channels in regions.items()
+        }
+        for name, regions in montages.items()
+    }
@@ -0,0 +1,160 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+
+import rawCache
+
+# Parameters
+DEFAULT_REGISTRY_DIR = os.path.join(os.path.expanduser("~"), ".eeg_scaler_registry")
+DEFAULT_MAX_ENTRIES = 200
+
+
+class ScalerRegistry:
+    """
+    Fitted scalers keyed by (cohort, scaler type and parameters, content of the input files).
+    Every entry is a joblib .pkl with a .json description next to it; loading an entry marks it
+    as recently used, and the least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, registry_dir=DEFAULT_REGISTRY_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.registry_dir = registry_dir
+        self.max_entries = max_entries
+        # Content hashes are stamped per (path, size, mtime) so unchanged inputs are not rehashed
+        self.stamps = rawCache.RawCache(os.path.join(registry_dir, 'stamps'))
+
+    def key(self, cohort, scaler, files):
+        """Registry key of a scaler fitted on files; the order of the files does not matter."""
+        os.makedirs(self.stamps.cache_dir, exist_ok=True)
+        description = {
+            'cohort': cohort,
+            'scaler': type(scaler).__name__,
+            'params': {name: repr(value) for name, value in scaler.get_params().items()},
+            'files': sorted(self.stamps.content_key(file, 'features') for file in files)
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def load(self, key):
+        """Returns the fitted scaler of a key, or None when it is not registered."""
+        entry = os.path.join(self.registry_dir, key + '.pkl')
+        if not os.path.exists(entry):
+            return None
+        os.utime(entry)
+        return joblib.load(entry)
+
+    def save(self, key, scaler, cohort, files):
+        os.makedirs(self.registry_dir, exist_ok=True)
+        entry = os.path.join(self.registry_dir, key + '.pkl')
+        temp_entry = f"{entry[:-len('.pkl')]}.{os.getpid()}.tmp.pkl"
+        joblib.dump(scaler, temp_entry)
+        with open(os.path.join(self.registry_dir, key + '.json'), 'w') as handle:
+            json.dump({'key': key, 'cohort': cohort, 'scaler': type(scaler).__name__, 'files': len(files),
+                       'rows': int(np.max(getattr(scaler, 'n_samples_seen_', 0))), 'created': time.time()}, handle)
+        os.replace(temp_entry, entry)
+        self.evict(keep=entry)
+        return entry
+
+    def fit_or_load(self, cohort, scaler, files, fit):
+        """
+        Returns (fitted scaler, reused): the registered scaler for (cohort, scaler, files) when
+        there is one, otherwise fit() registered under that key.
+        """
+        key = self.key(cohort, scaler, files)
+        fitted = self.load(key)
+        if fitted is not None:
+            return fitted, True
+        fitted = fit()
+        self.save(key, fitted, cohort, files)
+        return fitted, False
+
+    def entries(self):
+        """
+        Lists the registered scalers as dicts (key, cohort, scaler, files, rows, created, path,
+        last_used), least recently used first.
+        """
+        entries = []
+        for entry in glob.glob(os.path.join(self.registry_dir, '*.pkl')):
+            description_file = entry[:-len('.pkl')] + '.json'
+            if '.tmp.' in entry or not os.path.exists(description_file):
+                continue
+            with open(description_file) as handle:
+                description = json.load(handle)
+            entries.append({**description, 'path': entry, 'last_used': os.stat(entry).st_mtime})
+        return sorted(entries, key=lambda item: item['last_used'])
+
+    def evict(self, max_entries=None, max_age_days=None, keep=None):
+        """
+        Deletes the least recently used entries beyond max_entries (the registry's limit by
+        default) and those unused for more than max_age_days, and the content hash stamps of
+        input files that changed or are gone. Returns the number of entries deleted.
+        """
+        self.stamps.prune_stamps()
+        max_entries = self.max_entries if max_entries is None else max_entries
+        entries = self.entries()
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        removed = 0
+        for idx, entry in enumerate(entries):
+            if entry['path'] == keep:
+                continue
+            if len(entries) - idx <= max_entries and (cutoff is None or entry['last_used'] >= cutoff):
+                continue
+            try:
+                os.remove(entry['path'])
+                os.remove(entry['path'][:-len('.pkl')] + '.json')
+            except OSError:
+                continue
+            removed += 1
+        return removed
+
+
+def get_registry(self):
+    """Returns the ScalerRegistry configured in the interface, or None when it is disabled."""
+    if not self.registry_var.get():
+        return None
+    return ScalerRegistry(self.registry_dir.get() or DEFAULT_REGISTRY_DIR)
+
+
+def fitted_scaler(self, cohort, scaler, files, fit):
+    """
+    Returns the scaler a normalization run should use for a cohort: the scaler file chosen in
+    the interface (e.g. the training set's train_scaler.pkl for stroke test sets), a matching
+    scaler from the registry, or fit() (registered when the registry is enabled).
+    """
+    scaler_file = self.scaler_file.get()
+    if scaler_file:
+        self.log(f"Loaded file: {os.path.normpath(scaler_file)}")
+        return joblib.load(scaler_file)
+
+    registry = get_registry(self)
+    if not registry:
+        return fit()
+    fitted, reused = registry.fit_or_load(cohort, scaler, files, fit)
+    self.log(f"{'Reused' if reused else 'Registered'} {type(fitted).__name__} for {cohort} "
+             f"({len(files)} files) in the scaler registry")
+    return fitted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or evict the fitted scalers in the scaler registry.")
+    parser.add_argument("command", choices=["list", "evict"])
+    parser.add_argument("--registry-dir", default=DEFAULT_REGISTRY_DIR)
+    parser.add_argument("--max-entries", type=int, help="Keep at most this many entries (evict)")
+    parser.add_argument("--older-than-days", type=float, help="Evict entries unused for this many days")
+    args = parser.parse_args(argv)
+
+    registry = ScalerRegistry(args.registry_dir)
+    if args.command == 'evict':
+        print(f"Evicted {registry.evict(args.max_entries, args.older_than_days)} entries")
+        return
+    for entry in registry.entries():
+        print(f"{entry['key'][:16]}  {entry['cohort']:<20} {entry['scaler']:<24} {entry['files']:5d} files "
+              f"{entry['rows']:9d} rows  last used {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_used']))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import numpy as np
+
+# Parameters
+BUFFER_SIZE = 1 << 16  # Bytes read from a channel row at a time
+CHUNK_SAMPLES = 1 << 14  # Samples per channel yielded by iter_sample_chunks
+
+
+def find_row_offsets(file, buffer_size=BUFFER_SIZE):
+    """Scans a file block by block and returns the byte offset of every non-empty line."""
+    offsets = []
+    position = 0
+    line_start = 0
+    line_empty = True
+    with open(file, 'rb') as handle:
+        while block := handle.read(buffer_size):
+            start = 0
+            while (newline := block.find(b'\n', start)) >= 0:
+                if not line_empty or block[start:newline].strip():
+                    offsets.append(line_start)
+                line_start, line_empty, start = position + newline + 1, True, newline + 1
+            line_empty = line_empty and not block[start:].strip()
+            position += len(block)
+    if not line_empty:
+        offsets.append(line_start)
+    return offsets
+
+
+def count_row_samples(file, offset=0, buffer_size=BUFFER_SIZE):
+    """Counts the comma-separated samples of the row starting at `offset` without parsing them."""
+    separators = 0
+    last_char = b''
+    with open(file, 'rb') as handle:
+        handle.seek(offset)
+        while block := handle.read(buffer_size):
+            newline = block.find(b'\n')
+            row = (block if newline < 0 else block[:newline]).rstrip()
+            separators += row.count(b',')
+            last_char = row[-1:] or last_char
+            if newline >= 0:
+                break
+
+    if not last_char:
+        return 0
+    # A trailing separator does not start another sample
+    return separators + 1 - (last_char == b',')
+
+
+class ChannelCursor:
+    """Reads the comma-separated samples of one channel row a few blocks at a time."""
+
+    def __init__(self, file, offset, buffer_size=BUFFER_SIZE):
+        self.handle = open(file, 'rb')
+        self.handle.seek(offset)
+        self.buffer_size = buffer_size
+        self.tokens = []
+        self.pending = b''
+        self.finished = False
+
+    def read(self, count):
+        """Returns up to `count` samples as a float array (fewer once the row is exhausted)."""
+        while len(self.tokens) < count and not self.finished:
+            block = self.handle.read(self.buffer_size)
+            newline = block.find(b'\n')
+            if newline >= 0 or not block:
+                # Last block of this row: flush the partial token as well
+                tail = block[:newline] if newline >= 0 else block
+                parts = (self.pending + tail).rstrip(b'\r').split(b',')
+                self.tokens.extend(part for part in parts if part.strip())
+                self.pending = b''
+                self.finished = True
+            else:
+                parts = (self.pending + block).split(b',')
+                self.pending = parts.pop()
+                self.tokens.extend(parts)
+
+        chunk, self.tokens = self.tokens[:count], self.tokens[count:]
+        return np.array(chunk, dtype=bytes).astype(np.float64)
+
+    def close(self):
+        self.handle.close()
+
+
+def iter_sample_chunks(file, chunk_samples=CHUNK_SAMPLES, buffer_size=BUFFER_SIZE):
+    """
+    Yields (channels, samples) float chunks of a headerless channels x samples CSV,
+    holding at most one chunk per channel in memory regardless of the recording length.
+    """
+    cursors = [ChannelCursor(file, offset, buffer_size) for offset in find_row_offsets(file, buffer_size)]
+    try:
+        while True:
+            rows = [cursor.read(chunk_samples) for cursor in cursors]
+            lengths = {len(row) for row in rows}
+            if len(lengths) > 1:
+                raise ValueError(f"Channel rows of {file} have different numbers of samples.")
+            if not rows or lengths == {0}:
+                return
+            yield np.vstack(rows)
+    finally:
+        for cursor in cursors:
+            cursor.close()
@@ -0,0 +1,277 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+import featureStore
+import profiler
+
+# Parameters
+DEFAULT_ERROR = 0.001  # Rank error bound of the quantile sketches (fraction of the rows)
+SKETCH_CONSTANT, SKETCH_EXPONENT = 2.446, 0.9433  # KLL rank error ~ 2.446 / k**0.9433 at 99% confidence (DataSketches)
+QUANTILE_BOUNDS = 1e-7  # Clipping of the uniform ranks before the normal inverse CDF (as in scikit-learn)
+
+
+class QuantileSketch:
+    """
+    Mergeable KLL quantile sketch of every column of a table. Each level h holds rows of weight
+    2**h; a level over capacity is sorted per column and every other row, from a random offset,
+    moves up a level. All columns see the same rows, so their levels have the same sizes and
+    are kept as one 2-D array per level. Quantiles are within error (as a fraction of the rows
+    seen) with about 99% confidence, using O(1 / error) rows per column.
+    """
+
+    def __init__(self, error=DEFAULT_ERROR, seed=0):
+        self.error = error
+        self.k = max(8, int(np.ceil((SKETCH_CONSTANT / error) ** (1 / SKETCH_EXPONENT))))
+        self.levels = []
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - level))))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+        if not self.levels:
+            self.levels = [values[:0]]
+        self.levels[0] = np.vstack([self.levels[0], values])
+        self.count += len(values)
+        self.compress()
+
+    def merge(self, other):
+        """Adds the rows summarized by another sketch of the same columns and error."""
+        if other.error != self.error:
+            raise ValueError(f"Cannot merge sketches with error {self.error} and {other.error}.")
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(items[:0])
+            self.levels[level] = np.vstack([self.levels[level], items])
+        self.count += other.count
+        self.compress()
+        return self
+
+    def compress(self):
+        # Adding a level shrinks the capacities of the ones below, so passes repeat until all fit
+        while any(len(items) > self.capacity(level) for level, items in enumerate(self.levels)):
+            level = 0
+            while level < len(self.levels):
+                if len(self.levels[level]) > self.capacity(level):
+                    if level + 1 == len(self.levels):
+                        self.levels.append(self.levels[level][:0])
+                    items = np.sort(self.levels[level], axis=0)
+                    keep = len(items) % 2  # An odd row out stays on this level
+                    self.levels[level] = items[:keep]
+                    self.levels[level + 1] = np.vstack([self.levels[level + 1],
+                                                        items[keep + self.rng.integers(2)::2]])
+                level += 1
+
+    def quantiles(self, q):
+        """Returns an array (len(q), columns) of the q-quantiles (0..1) of every column."""
+        if not self.count:
+            raise ValueError("The sketch has not seen any rows.")
+        items = np.vstack(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, axis=0)
+        cumulative = np.cumsum(weights[order], axis=0)
+        targets = np.asarray(q, dtype=np.float64) * self.count
+        result = np.empty((len(targets), items.shape[1]))
+        for column in range(items.shape[1]):
+            idx = np.minimum(np.searchsorted(cumulative[:, column], targets), len(items) - 1)
+            result[:, column] = items[order[idx, column], column]
+        return result
+
+
+class StreamingRobustScaler(TransformerMixin, BaseEstimator):
+    """
+    RobustScaler (centers on the median, scales by the interquartile range) fitted from a
+    QuantileSketch, so it can be fitted file by file with partial_fit and merged across
+    processes. Constant columns keep a scale of 1.
+    """
+
+    def __init__(self, quantile_range=(25.0, 75.0), error=DEFAULT_ERROR, random_state=0):
+        self.quantile_range = quantile_range
+        self.error = error
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        if hasattr(self, 'sketch_'):
+            del self.sketch_
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        if not hasattr(self, 'sketch_'):
+            self.sketch_ = QuantileSketch(self.error, self.random_state)
+        self.sketch_.update(X)
+        return self._refresh()
+
+    def merge(self, other):
+        self.sketch_.merge(other.sketch_)
+        return self._refresh()
+
+    def _refresh(self):
+        low, median, high = self.sketch_.quantiles([self.quantile_range[0] / 100, 0.5, self.quantile_range[1] / 100])
+        self.center_ = median
+        self.scale_ = np.where(high - low == 0, 1.0, high - low)
+        self.n_samples_seen_ = self.sketch_.count
+        return self
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.center_) / self.scale_
+
+    def inverse_transform(self, X):
+        return np.asarray(X, dtype=np.float64) * self.scale_ + self.center_
+
+
+class StreamingQuantileScaler(TransformerMixin, BaseEstimator):
+    """
+    QuantileTransformer (maps every column through its empirical CDF to a uniform or normal
+    distribution) with the n_quantiles reference quantiles taken from a QuantileSketch, so it
+    can be fitted file by file with partial_fit and merged across processes.
+    """
+
+    def __init__(self, n_quantiles=1000, output_distribution='uniform', error=DEFAULT_ERROR, random_state=0):
+        self.n_quantiles = n_quantiles
+        self.output_distribution = output_distribution
+        self.error = error
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        if hasattr(self, 'sketch_'):
+            del self.sketch_
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        if self.output_distribution not in ('uniform', 'normal'):
+            raise ValueError(f"Unknown output distribution {self.output_distribution!r}; expected uniform or normal.")
+        if not hasattr(self, 'sketch_'):
+            self.sketch_ = QuantileSketch(self.error, self.random_state)
+        self.sketch_.update(X)
+        return self._refresh()
+
+    def merge(self, other):
+        self.sketch_.merge(other.sketch_)
+        return self._refresh()
+
+    def _refresh(self):
+        self.references_ = np.linspace(0, 1, self.n_quantiles)
+        self.quantiles_ = self.sketch_.quantiles(self.references_)
+        self.n_samples_seen_ = self.sketch_.count
+        return self
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        result = np.empty_like(X)
+        for column in range(X.shape[1]):
+            quantiles = self.quantiles_[:, column]
+            # Interpolating forwards and backwards and averaging spreads repeated quantiles evenly
+            result[:, column] = 0.5 * (np.interp(X[:, column], quantiles, self.references_) -
+                                       np.interp(-X[:, column], -quantiles[::-1], -self.references_[::-1]))
+        if self.output_distribution == 'normal':
+            result = norm.ppf(np.clip(result, QUANTILE_BOUNDS, 1 - QUANTILE_BOUNDS))
+        return result
+
+
+SCALERS = {
+    'Standard': StandardScaler,
+    'MinMax': MinMaxScaler,
+    'Robust': StreamingRobustScaler,
+    'Quantile': StreamingQuantileScaler
+}
+
+
+def new_scaler(name, error=DEFAULT_ERROR):
+    """A new scaler by its interface name; error is the rank error bound of the sketch-based ones."""
+    if name not in SCALERS:
+        raise ValueError(f"Unknown scaler {name!r}; expected one of {', '.join(SCALERS)}.")
+    if name in ('Robust', 'Quantile'):
+        return SCALERS[name](error=error)
+    return SCALERS[name]()
+
+
+def numeric_columns(df):
+    return df.select_dtypes(include=['float64', 'int64']).columns
+
+
+def fit_files(files, read, scaler, on_file=None):
+    """
+    First streaming pass: reads the files one at a time with read(file) and updates the
+    scaler's statistics with partial_fit, so only one file is held in memory. on_file(index)
+    is called after every file. Returns the fitted scaler and the number of rows seen.
+    """
+    rows = 0
+    for idx, file in enumerate(files):
+        with profiler.phase('read'):
+            df = read(file)
+        with profiler.phase('fit'):
+            scaler.partial_fit(df[numeric_columns(df)])
+        rows += len(df)
+        if on_file:
+            on_file(idx)
+    return scaler, rows
+
+
+def fit_files_parallel(files, read, scaler, workers=1, on_file=None):
+    """
+    fit_files spread over worker processes: every worker fits a copy of the scaler on a
+    contiguous share of the files and the copies are merged in file order. Every copy gets its
+    own random_state (offset by its share) so the workers' sketches compact independently. Only
+    scalers with a merge method (the sketch-based ones) are fitted in parallel; the others, and
+    workers=1, fall back to fit_files.
+    """
+    if workers <= 1 or len(files) < 2 or not hasattr(scaler, 'merge'):
+        return fit_files(files, read, scaler, on_file)
+
+    shares = [list(share) for share in np.array_split(np.arange(len(files)), min(workers, len(files)))]
+    with ProcessPoolExecutor(max_workers=len(shares)) as executor:
+        futures = [executor.submit(fit_files, [files[idx] for idx in share], read,
+                                   clone(scaler).set_params(random_state=scaler.random_state + number))
+                   for number, share in enumerate(shares)]
+        merged, rows = None, 0
+        for share, future in zip(shares, futures):
+            fitted, share_rows = future.result()
+            with profiler.phase('merge'):
+                merged = fitted if merged is None else merged.merge(fitted)
+            rows += share_rows
+            for idx in share:
+                if on_file:
+                    on_file(idx)
+    return merged, rows
+
+
+def transform_files(files, read, scaler, output_file, header, on_file=None, table_format='CSV'):
+    """
+    Second streaming pass: reads the files again, normalizes their numeric columns with the
+    fitted scaler and appends the rows to output_file (header written once) and/or a columnar
+    table next to it, as featureStore.write_table would. Returns the number of rows written and
+    the written paths.
+    """
+    rows = 0
+    write_csv = table_format != 'Columnar'
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    writer = featureStore.ColumnarWriter(os.path.splitext(output_file)[0] + featureStore.COLUMNAR_SUFFIX, header) \
+        if 'Columnar' in table_format else None
+    for idx, file in enumerate(files):
+        with profiler.phase('read'):
+            df = read(file)
+        with profiler.phase('transform'):
+            numeric_cols = numeric_columns(df)
+            df_normalized = pd.DataFrame(scaler.transform(df[numeric_cols]), columns=numeric_cols)
+            df_normalized = pd.concat([df_normalized, df.drop(columns=numeric_cols)], axis=1)[df.columns]
+        if write_csv:
+            with profiler.phase('write_csv'):
+                df_normalized.to_csv(output_file, mode='a', index=False, header=header if idx == 0 else False)
+        if writer:
+            with profiler.phase('write_columnar'):
+                writer.append(df_normalized)
+        rows += len(df)
+        if on_file:
+            on_file(idx)
+    return rows, ([output_file] if write_csv else []) + ([writer.close()] if writer else [])
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+import bioReader
+
+# Parameters
+GAP_MARKER = "==="  # Written by the device for samples it could not compute
+GAP_POLICIES = ['Drop', 'Forward Fill', 'Interpolate']
+
+
+def read_export(file, columns, gap_policy='Drop'):
+    """
+    Reads the selected band-power columns of a stroke device export (.csv or .TXT) as floats.
+    The first row holds the column names, in upper case in the CSV exports and mixed case and
+    quoted in the TXT exports, and is matched case-insensitively; the second row holds units
+    and is skipped. Gap markers are parsed as missing values and handled with fill_gaps.
+    Native .BIO archives hold no band powers and are rejected (see bioReader).
+    """
+    if file.lower().endswith('.bio'):
+        return bioReader.read_band_powers(file, columns)
+
+    wanted = {column.upper() for column in columns}
+    df = pd.read_csv(file, skiprows=[1], usecols=lambda column: column.strip().upper() in wanted,
+                     na_values=[GAP_MARKER], keep_default_na=False, dtype=np.float64, float_precision='round_trip')
+    df.columns = [column.strip().upper() for column in df.columns]
+
+    missing = wanted - set(df.columns)
+    if missing:
+        raise ValueError(f"{file} has no column {', '.join(sorted(missing))}.")
+    return fill_gaps(df[[column.upper() for column in columns]], gap_policy)
+
+
+def fill_gaps(df, gap_policy='Drop'):
+    """
+    Applies a gap policy to missing values: 'Drop' removes every row with a gap, 'Forward Fill'
+    repeats the last value before the gap and 'Interpolate' fills linearly between the values
+    around it. Rows that cannot be filled (leading gaps, and trailing gaps when interpolating)
+    are dropped. The index is reset afterwards.
+    """
+    if gap_policy == 'Forward Fill':
+        df = df.ffill()
+    elif gap_policy == 'Interpolate':
+        df = df.interpolate(method='linear', limit_area='inside')
+    elif gap_policy != 'Drop':
+        raise ValueError(f"Unknown gap policy {gap_policy!r}; expected one of {', '.join(GAP_POLICIES)}.")
+    return df.dropna().reset_index(drop=True)
@@ -1,25 +1,29 @@
 import threading
 import os
+from collections import Counter
 import pandas as pd
-from sklearn.svm import SVC
-from sklearn.model_selection import GridSearchCV
 import joblib
 import time
 
+import featureStore
+import profiler
+import svmSearch
+
 def animate_progress(self):
     """Moves the progress bar smoothly from left to right repeatedly."""
-    self.progress_bar["value"] = 0  # Start from 0
+    self.set_progress(0)  # Start from 0
     while self.running:
         for value in range(0, 101, 2):  # Increase smoothly
-            self.progress_bar["value"] = value
-            self.root.update_idletasks()  # Force UI update
+            self.set_progress(value)
             time.sleep(0.02)  # Adjust speed for smooth motion
-        self.progress_bar["value"] = 0  # Reset and start again
+        self.set_progress(0)  # Reset and start again
 
+@profiler.profiled('svm')
 def process(self):
     """
     Trains an SVM model with hyperparameter tuning,
     predicts on test data, and saves results.
+    Returns the number of rows trained on and predicted.
     """
     self.log("Starting processing...")
     self.running = True  # Start progress animation
@@ -36,25 +40,26 @@ def process(self):
         os.makedirs(output_dir, exist_ok=True)
 
         # Load training and test data
-        X_train, y_train = load_data(train_data_path, is_train=True)
-        X_test, _ = load_data(test_data_path, is_train=False)
+        with profiler.phase('read'):
+            X_train, y_train = load_data(train_data_path, is_train=True)
+            X_test, _ = load_data(test_data_path, is_train=False)
+        stats = Counter(rows=len(X_test))
 
         if not model_file_path:
-            # Hyperparameter tuning with GridSearchCV
-            param_grid = {
-                'C': [1, 10],  # Reduce the number of values
-                'gamma': ['scale', 0.01],  # Keep only two options
-                'kernel': ['rbf', 'poly']  # Test only two kernels
-            }
-            # param_grid = {
-            #     'C': [0.1, 1, 10, 100],
-            #     'gamma': ['scale', 'auto', 0.001, 0.01, 0.1, 1],
-            #     'kernel': ['rbf', 'poly', 'sigmoid']  # Trying different kernels
-            # }
-            grid_search = GridSearchCV(SVC(), param_grid, cv=5, scoring='accuracy')
-            grid_search.fit(X_train, y_train)
-            model = grid_search.best_estimator_
-            best_params = grid_search.best_params_
+            # Hyperparameter search (Quick or Full grid, exhaustive or successive halving, optional time budget,
+            # RBF kernels optionally precomputed once per gamma and shared across C values and folds)
+            time_budget = float(self.time_budget_var.get() or 0) or None
+            with profiler.phase('fit'):
+                model, summary = svmSearch.search(X_train, y_train, self.strategy_var.get(), self.grid_var.get(),
+                                                  int(self.jobs_var.get()), time_budget,
+                                                  kernel_cache=self.kernel_cache_var.get(),
+                                                  cache_mb=float(self.kernel_cache_mb_var.get()), log=self.log)
+            stats['rows'] += len(X_train)
+            stats['fits'] += summary['fits']
+            best_params = summary['best_params']
+            self.log(f"Searched {summary['candidates']} candidates ({summary['fits']} fits) in "
+                     f"{summary['seconds']:.1f} s, best accuracy {summary['best_score']:.4f}"
+                     + (" (time budget reached)" if summary['budget_exhausted'] else ""))
             self.log(f"Best hyperparameters: {best_params}")
 
             # Save the best model
@@ -69,26 +74,34 @@ def process(self):
             self.log(f"Best hyperparameters: {model.get_params()}")
 
         # Predict on test data
-        predictions = model.predict(X_test)
+        with profiler.phase('predict'):
+            predictions = model.predict(X_test)
 
         # Save predictions
-        test_data_file_name = os.path.basename(test_data_path)
+        test_data_file_name = os.path.basename(featureStore.columnar_dir(test_data_path) or test_data_path)
         result_df = pd.DataFrame(X_test)  # X_test retains original features
         result_df['Predictions'] = predictions
-        predictions_filename = os.path.join(output_dir, test_data_file_name.replace('.csv', '_predictions.csv'))
-        result_df.to_csv(predictions_filename, index=False)
+        predictions_filename = os.path.join(output_dir, os.path.splitext(test_data_file_name)[0] + '_predictions.csv')
+        with profiler.phase('write_csv'):
+            result_df.to_csv(predictions_filename, index=False)
         self.log(f"Predictions saved to: {predictions_filename}")
+        return stats
 
     finally:
         # Stop the progress bar animation after processing is complete
         self.running = False
-        self.progress_bar["value"] = 100  # Set progress bar to full when done
+        self.set_progress(100)  # Set progress bar to full when done
 
 
 
 def load_data(file_path, is_train):
-    """Loads and processes data from CSV."""
-    df = pd.read_csv(file_path, header=0)
+    """Loads and processes data from CSV, from a feature table in .npz format or from a columnar table."""
+    if featureStore.columnar_dir(file_path):
+        df = featureStore.read_columnar(file_path)
+    elif file_path.endswith('.npz'):
+        df = featureStore.read_table(file_path)
+    else:
+        df = pd.read_csv(file_path, header=0)
     if is_train:
         X = df.drop(columns=['CLASS'])
         y = df['CLASS']
@@ -0,0 +1,242 @@
+import math
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics.pairwise import euclidean_distances
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.svm import SVC
+
+import profiler
+
+# Parameters
+GRIDS = {
+    'Quick': {
+        'C': [1, 10],
+        'gamma': ['scale', 0.01],
+        'kernel': ['rbf', 'poly']
+    },
+    'Full': {
+        'C': [0.1, 1, 10, 100],
+        'gamma': ['scale', 'auto', 0.001, 0.01, 0.1, 1],
+        'kernel': ['rbf', 'poly', 'sigmoid']
+    }
+}
+STRATEGIES = ['Grid', 'Halving']
+DEFAULT_FOLDS = 5
+HALVING_FACTOR = 3
+MIN_ROWS_PER_CLASS_FOLD = 4  # Smallest halving subset: this many rows per class in every fold
+KERNEL_CACHE_MAX_MB = 1024  # Above this the RBF kernels are computed on the fly by libsvm
+
+
+def fit_and_score(estimator, params, X, y, train, test):
+    """Fits a copy of estimator with params on the train rows and returns its accuracy on the test rows."""
+    model = clone(estimator).set_params(**params).fit(X[train], y[train])
+    return model.score(X[test], y[test])
+
+
+def resolve_gamma(gamma, X):
+    """The numeric RBF gamma SVC would use when fitted on X."""
+    if gamma == 'scale':
+        variance = X.var()
+        return 1.0 / (X.shape[1] * variance) if variance != 0 else 1.0
+    if gamma == 'auto':
+        return 1.0 / X.shape[1]
+    return float(gamma)
+
+
+def fit_and_score_cached(estimator, group, distances, X, y, rows, train, test):
+    """
+    Fits a copy of estimator with every params of group (RBF candidates differing only in C)
+    on the train positions of rows and returns their accuracies on the test positions. The
+    RBF kernel blocks are taken once from the squared distances between the rows and shared
+    by all the C values.
+    """
+    gamma = resolve_gamma(group[0].get('gamma', 'scale'), X[rows[train]])
+    with profiler.phase('kernel'):
+        train_kernel = np.exp(-gamma * distances[np.ix_(train, train)])
+        test_kernel = np.exp(-gamma * distances[np.ix_(test, train)])
+    scores = []
+    for params in group:
+        model = clone(estimator).set_params(**{**params, 'kernel': 'precomputed'}).fit(train_kernel, y[rows[train]])
+        scores.append(model.score(test_kernel, y[rows[test]]))
+    return scores
+
+
+def tagged(tag, task):
+    """Runs a delayed task and returns (tag, result), so results arriving out of order can be matched."""
+    function, args, kwargs = task
+    return tag, function(*args, **kwargs)
+
+
+def kernel_cache_mb(rows, folds, n_jobs):
+    """Estimated MB of the squared distances between rows plus the kernel blocks of n_jobs concurrent fits."""
+    train_rows = rows - rows // folds
+    return 8 * (rows ** 2 + n_jobs * train_rows * rows) / 2 ** 20
+
+
+def evaluate(parallel, estimator, candidates, X, y, rows, folds, n_jobs, deadline, cache_mb=None, log=print):
+    """
+    Cross-validates candidates on the given rows, fanning all the (candidate x fold) fits out
+    to parallel (a Parallel returning an unordered generator) so no job waits for a slow fit of
+    another candidate. The fits are generated lazily as jobs free up, and no new candidate is
+    started past the deadline (started ones finish their folds). Returns {candidate index:
+    mean accuracy} of the evaluated candidates.
+
+    With cache_mb, the squared distances between the rows are computed once when they fit in
+    cache_mb, and the RBF candidates differing only in C are fitted together on precomputed
+    kernels sliced from them for every fold; otherwise every fit computes its kernel on the fly.
+    """
+    splits = list(StratifiedKFold(n_splits=folds).split(rows, y[rows]))
+
+    # Units of work: groups of RBF candidates sharing a kernel, or single candidates
+    units, distances = [[idx] for idx in range(len(candidates))], None
+    if cache_mb and any(params.get('kernel', 'rbf') == 'rbf' for params in candidates):
+        needed_mb = kernel_cache_mb(len(rows), folds, n_jobs)
+        if needed_mb <= cache_mb:
+            with profiler.phase('distances'):
+                distances = euclidean_distances(np.asarray(X[rows], dtype=np.float64), squared=True)
+            groups, units = {}, []
+            for idx, params in enumerate(candidates):
+                if params.get('kernel', 'rbf') != 'rbf':
+                    units.append([idx])
+                    continue
+                key = tuple(sorted((name, repr(value)) for name, value in params.items() if name != 'C'))
+                if key not in groups:
+                    groups[key] = []
+                    units.append(groups[key])
+                groups[key].append(idx)
+        else:
+            log(f"Kernel cache needs {needed_mb:.0f} MB for {len(rows)} rows (limit {cache_mb:.0f} MB); "
+                f"computing kernels on the fly (raise the cache limit to use it)")
+
+    def unit_task(unit, train, test):
+        if distances is not None and candidates[unit[0]].get('kernel', 'rbf') == 'rbf':
+            return delayed(fit_and_score_cached)(estimator, [candidates[idx] for idx in unit], distances, X, y, rows,
+                                                 train, test)
+        return delayed(fit_and_score)(estimator, candidates[unit[0]], X, y, rows[train], rows[test])
+
+    def tasks():
+        for number, unit in enumerate(units):
+            if deadline and time.perf_counter() > deadline:
+                return
+            for train, test in splits:
+                yield delayed(tagged)(number, unit_task(unit, train, test))
+
+    scores, fold_scores = {}, {}
+    for number, unit_scores in parallel(tasks()):
+        fold_scores.setdefault(number, []).append(unit_scores)
+        if len(fold_scores[number]) == folds:
+            unit_scores = np.array(fold_scores[number], dtype=np.float64).reshape(folds, -1)
+            for position, idx in enumerate(units[number]):
+                scores[idx] = float(np.mean(unit_scores[:, position]))
+    return scores
+
+
+def best_of(scores):
+    """Index of the best mean accuracy, the first one on ties (as GridSearchCV)."""
+    return max(sorted(scores), key=lambda idx: scores[idx])
+
+
+def search(X, y, strategy='Grid', grid='Quick', n_jobs=1, time_budget=None, folds=DEFAULT_FOLDS, kernel_cache=False,
+           cache_mb=KERNEL_CACHE_MAX_MB, log=print):
+    """
+    Searches the SVC hyperparameters of a grid (a name in GRIDS or a param grid) and returns
+    the best model refitted on all rows together with a summary dict.
+
+    'Grid' cross-validates every candidate on all rows, like GridSearchCV. 'Halving' starts
+    every candidate on a small stratified subset and keeps the best 1 / HALVING_FACTOR for
+    each next round on HALVING_FACTOR times more rows, up to all rows. The (candidate x fold)
+    fits run on n_jobs processes. With a time_budget (seconds), no new candidate starts once
+    it is spent and the best candidate evaluated so far is used.
+
+    With kernel_cache, the RBF candidates are cross-validated on precomputed kernels (see
+    evaluate) as long as they fit in cache_mb. The best model is always refitted as a regular
+    SVC, so predicting only computes the kernel between the test rows and its support vectors.
+    """
+    cache_mb = cache_mb if kernel_cache else None
+    started = time.perf_counter()
+    deadline = started + time_budget if time_budget else None
+    candidates = list(ParameterGrid(GRIDS[grid] if isinstance(grid, str) else grid))
+    X_array, y_array = np.asarray(X), np.asarray(y)
+    estimator = SVC()
+
+    with Parallel(n_jobs=n_jobs, return_as='generator_unordered') as parallel, profiler.phase('search'):
+        if strategy == 'Grid':
+            scores = evaluate(parallel, estimator, candidates, X_array, y_array, np.arange(len(y_array)), folds,
+                              n_jobs, deadline, cache_mb, log)
+            rounds = [(len(candidates), len(y_array), len(scores))]
+        elif strategy == 'Halving':
+            scores, rounds = halving(parallel, estimator, candidates, X_array, y_array, folds, n_jobs, deadline,
+                                     cache_mb, log)
+        else:
+            raise ValueError(f"Unknown search strategy {strategy!r}; expected one of {', '.join(STRATEGIES)}.")
+    if not scores:
+        raise ValueError(f"The time budget of {time_budget} s ran out before any candidate was evaluated.")
+
+    best = best_of(scores)
+    with profiler.phase('refit'):
+        model = clone(estimator).set_params(**candidates[best]).fit(X, y)
+    summary = {
+        'strategy': strategy,
+        'candidates': len(candidates),
+        'best_params': candidates[best],
+        'best_score': scores[best],
+        'rounds': rounds,
+        'fits': sum(evaluated for _, _, evaluated in rounds) * folds,
+        'budget_exhausted': bool(deadline and time.perf_counter() > deadline),
+        'seconds': time.perf_counter() - started
+    }
+    return model, summary
+
+
+def stratified_order(y, seed=0):
+    """
+    A permutation of the rows whose every prefix keeps the class proportions of y: each class
+    is shuffled and its rows are spread evenly over the order.
+    """
+    rng = np.random.default_rng(seed)
+    positions = np.empty(len(y))
+    for label in np.unique(y):
+        members = rng.permutation(np.flatnonzero(y == label))
+        positions[members] = (np.arange(len(members)) + rng.random()) / len(members)
+    return np.argsort(positions, kind='stable')
+
+
+def halving(parallel, estimator, candidates, X, y, folds, n_jobs, deadline, cache_mb=None, log=print):
+    """
+    Successive halving over nested stratified subsets (prefixes of stratified_order). The first
+    subset holds at least MIN_ROWS_PER_CLASS_FOLD rows of the smallest class in every fold.
+    Returns the scores of the last round that evaluated anything (on the most rows) and a
+    (candidates, rows, evaluated) tuple per round.
+    """
+    order = stratified_order(y)
+    num_rounds = max(1, math.ceil(math.log(len(candidates), HALVING_FACTOR)) + 1)
+    smallest_class = np.unique(y, return_counts=True)[1].min()
+    min_rows = math.ceil(MIN_ROWS_PER_CLASS_FOLD * folds * len(y) / smallest_class)
+    rows = max(min_rows, len(y) // HALVING_FACTOR ** (num_rounds - 1))
+
+    remaining = list(range(len(candidates)))
+    scores, rounds = {}, []
+    while True:
+        subset = np.sort(order[:min(rows, len(y))])
+        round_scores = evaluate(parallel, estimator, [candidates[idx] for idx in remaining], X, y, subset, folds,
+                                n_jobs, deadline, cache_mb, log)
+        rounds.append((len(remaining), len(subset), len(round_scores)))
+        if not round_scores:
+            break
+        scores = {remaining[idx]: score for idx, score in round_scores.items()}
+        best = best_of(scores)
+        log(f"Halving round {len(rounds)}: {len(remaining)} candidates on {len(subset)} rows, "
+            f"best {scores[best]:.4f} with {candidates[best]}")
+        if len(round_scores) < len(remaining) or len(subset) == len(y):
+            break
+
+        # Keep the best candidates for the next round on more rows (a single survivor is simply the best)
+        keep = math.ceil(len(remaining) / HALVING_FACTOR)
+        if keep == 1:
+            break
+        remaining = sorted(scores, key=lambda idx: -scores[idx])[:keep]
+        rows *= HALVING_FACTOR
+    return scores, rounds
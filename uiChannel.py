@@ -0,0 +1,79 @@
+import queue
+import tkinter as tk
+from tkinter import scrolledtext
+
+# Parameters
+REFRESH_MS = 50  # Minimum time between UI refreshes
+MAX_BATCH = 1000  # Queued messages applied per refresh
+MAX_LOG_LINES = 5000  # Lines kept in a LogBox, oldest dropped first
+
+
+class LogBox(scrolledtext.ScrolledText):
+    """Log widget that keeps only the last max_lines lines."""
+
+    def __init__(self, master=None, max_lines=MAX_LOG_LINES, **kwargs):
+        super().__init__(master, **kwargs)
+        self.max_lines = max_lines
+
+    def append(self, messages):
+        """Appends a batch of messages with one insert, trims the oldest lines and scrolls to the end."""
+        self.insert(tk.END, "\n".join(messages) + "\n")
+        excess = int(self.index('end-1c').split('.')[0]) - 1 - self.max_lines
+        if excess > 0:
+            self.delete("1.0", f"{excess + 1}.0")
+        self.yview(tk.END)
+
+
+class UiChannel:
+    """
+    Carries log messages, progress updates and calls from worker threads to the Tk main loop.
+    Workers only put onto a queue and never wait on Tk. The main loop drains it with
+    root.after() every REFRESH_MS, applies up to MAX_BATCH messages per refresh, writes all of
+    a batch's log lines at once and sets the progress bar only to the latest value.
+    """
+
+    def __init__(self, root, log_box, progress_bar, refresh_ms=REFRESH_MS, max_batch=MAX_BATCH):
+        self.root = root
+        self.log_box = log_box
+        self.progress_bar = progress_bar
+        self.refresh_ms = refresh_ms
+        self.max_batch = max_batch
+        self.messages = queue.SimpleQueue()
+        self.root.after(self.refresh_ms, self.drain)
+
+    def log(self, message):
+        self.messages.put(('log', message))
+
+    def set_progress(self, value, maximum=None):
+        self.messages.put(('progress', value, maximum))
+
+    def call(self, function, *args):
+        """Runs function(*args) on the main loop, e.g. a messagebox raised by a worker."""
+        self.messages.put(('call', function, args))
+
+    def drain(self):
+        lines = []
+        progress = {}
+        calls = []
+        for _ in range(self.max_batch):
+            try:
+                kind, *payload = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'log':
+                lines.append(payload[0])
+            elif kind == 'progress':
+                value, maximum = payload
+                if maximum is not None:
+                    progress['maximum'] = maximum
+                progress['value'] = value
+            else:
+                calls.append(payload)
+
+        if lines:
+            self.log_box.append(lines)
+        if progress:
+            self.progress_bar.configure(**progress)
+        for function, args in calls:
+            function(*args)
+        self.root.after(self.refresh_ms, self.drain)